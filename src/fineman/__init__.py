@@ -1,3 +1,5 @@
+from .csr_graph import *
+from .parallel import *
 from .elimination_algorithm import *
 from .betweenness_reduction import *
 from .core_functions import *
@@ -6,6 +8,9 @@ from .preprocessing import *
 from .rand_is import *
 from .independent_set_or_crust import *
 from .heavy_light_partition import *
+from .potential_cache import *
+from .engines import *
+from .strong_components import *
 from .finemans_algorithm import *
 
 # Essentially exposes everything that doesn't start with "_", since "_"
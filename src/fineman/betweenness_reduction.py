@@ -1,55 +1,137 @@
+from itertools import repeat
 from math import ceil, log
 import random as rand
-from src.fineman.core_functions import h_hop_sssp, super_source_bfd, transpose_graph
 
-def betweenness_reduction(graph: dict[int, dict[int, float]], neg_edges, tau, beta, c = 3, seed = None):
+import numpy as np
+
+from src.fineman.core_functions import find_negative_cycle, multi_source_h_hop_sssp, super_source_bfd, \
+    transpose_graph, _like
+from src.fineman.csr_graph import CSRGraph, to_csr, distance_dtype, improvement_check, infinity
+from src.utils import NegativeCycleError
+import src.globals as globals
+
+# the default of c, the factor of the c * tau * ceil(ln n) vertices sampled
+SAMPLING_CONSTANT = 3
+
+# the number of columns of the distance matrices relaxed at once, which bounds the temporary arrays
+_BLOCK_SIZE = 4096
+
+def betweenness_reduction(graph, neg_edges, tau, beta, c = SAMPLING_CONSTANT, seed = None, executor = None):
     if (beta < 1) or (tau < 1) or (tau > len(graph)) or (c <= 1):
         raise ValueError("Invalid parameter")
 
     if seed is not None:
         rand.seed(seed)
 
-    n = len(graph)
+    csr = to_csr(graph, neg_edges)
+    n = csr.n
     sample_size = int(c*tau*ceil(log(n)))
-    if sample_size > len(graph):
-        sample_size = len(graph)
+    if sample_size > n:
+        sample_size = n
 
-    T = rand.sample(tuple(graph.keys()), sample_size)
+    T = rand.sample(tuple(range(n)), sample_size)
 
-    t_graph,t_neg_edges = transpose_graph(graph)
+    t_graph,t_neg_edges = transpose_graph(csr)
     
-    distances = {}
-    for x in T:
-        distances[x] = (h_hop_sssp(x, graph, neg_edges, beta), h_hop_sssp(x, t_graph,t_neg_edges, beta))
+    if executor is None:
+        dists_from_T = multi_source_h_hop_sssp(T, csr, csr.neg_mask, beta)
+        dists_to_T = multi_source_h_hop_sssp(T, t_graph, t_neg_edges, beta)
+    else:
+        dists_from_T = _parallel_h_hop_sssp(executor, T, csr, beta)
+        dists_to_T = _parallel_h_hop_sssp(executor, T, t_graph, beta)
 
-    h_graph, h_neg_edges = _construct_h(graph, T, distances)
-    
     l = 2*sample_size
 
-    return super_source_bfd(h_graph, h_neg_edges, l, cycleDetection=True)
+    return _like(graph, _star_bfd(csr, T, dists_from_T, dists_to_T, l))
 
 
-def _construct_h(graph: dict[int, dict[int, float]], T, distances):
-    h_graph = {}
-    h_neg_edges = set()
+def _parallel_h_hop_sssp(executor, T, graph, beta):
+    chunks = [chunk.tolist() for chunk in np.array_split(np.asarray(T, dtype=np.int64), executor.workers) if len(chunk)]
+    if not chunks:
+        return multi_source_h_hop_sssp(T, graph, graph.neg_mask, beta)
 
-    for v in graph.keys():
-        if v not in h_graph:
-            h_graph[v] = {}
+    with executor.share(graph) as shared:
+        return np.concatenate(executor.map(_h_hop_sssp_task, repeat(shared), chunks, repeat(beta)))
 
-        for t in T:
-            if v == t:
-                continue
+def _h_hop_sssp_task(shared, sources, beta):
+    graph = shared.attach()
+    return multi_source_h_hop_sssp(sources, graph, graph.neg_mask, beta)
 
-            if t not in h_graph:
-                h_graph[t] = {}
 
-            h_graph[t][v] = distances[t][0][v]
-            if distances[t][0][v] < 0:
-                h_neg_edges.add((t,v))
+def _star_bfd(graph: CSRGraph, T, dists_from_T, dists_to_T, h: int):
+    """
+    Runs super_source_bfd with cycle detection on the graph H without constructing it. H has an edge from every t
+    in T to every other vertex and back, weighted by the h-hop distance in that direction. Every edge of H has an
+    endpoint in T, so H is given by the distance matrices: row i holds the weights of the edges from T[i] to every
+    other vertex and from every other vertex to T[i]. The matrices are used as scratch space.
+    """
+    n = graph.n
+    T = np.asarray(T, dtype=np.int64)
+    dist = np.full(n, globals.WEIGHT_TYPE(0), dtype=distance_dtype())
+    if not len(T):
+        return dist
 
-            h_graph[v][t] = distances[t][1][v]
-            if distances[t][1][v] < 0:
-                h_neg_edges.add((v,t))
-    
-    return h_graph, h_neg_edges
+    from_T = np.asarray(dists_from_T, dtype=distance_dtype())
+    to_T = np.asarray(dists_to_T, dtype=distance_dtype())
+    rows = np.arange(len(T))
+    from_T[rows, T] = infinity()
+    to_T[rows, T] = infinity()
+
+    # the negative edges are kept as edge arrays for the Bellman-Ford rounds and removed from the matrices, which
+    # then only hold the edges of the Dijkstra searches
+    i, v = np.nonzero(from_T < 0)
+    j, x = np.nonzero(to_T < 0)
+    neg_u = np.concatenate([T[i], x])
+    neg_v = np.concatenate([v, T[j]])
+    neg_w = np.concatenate([from_T[i, v], to_T[j, x]])
+    from_T[i, v] = infinity()
+    to_T[j, x] = infinity()
+
+    hub = np.full(n, -1)
+    hub[T] = rows
+    improves = improvement_check()
+
+    # every vertex starts at distance 0, which no nonnegative edge improves, so the first Dijkstra is skipped
+    for round in range(h+1):
+        tentative = np.full(n, infinity(), dtype=distance_dtype())
+        np.minimum.at(tentative, neg_v, dist[neg_u] + neg_w)
+        starts = np.flatnonzero(improves(tentative, dist))
+        if not len(starts):
+            break
+        if round == h:
+            # the edges of H are distances in graph, so a negative cycle of H is a negative closed walk of graph
+            raise NegativeCycleError(find_negative_cycle(graph))
+
+        dist[starts] = tentative[starts]
+        _star_dijkstra(T, hub, from_T, to_T, dist, starts, improves)
+
+    return dist
+
+
+def _star_dijkstra(T, hub, from_T, to_T, dist, starts, improves):
+    """
+    Dijkstra over the edges of the matrices from the vertices in starts. Only the vertices of T have edges to other
+    vertices than those of T, so only they are queued: whenever distances improve, the edges of the improved vertices
+    into T are relaxed at once, and settling a vertex of T relaxes its edges to all vertices in one step.
+    """
+    pending = np.zeros(len(T), dtype=bool)
+
+    def improved(vertices):
+        for start in range(0, len(vertices), _BLOCK_SIZE):
+            block = vertices[start:start + _BLOCK_SIZE]
+            alt_dist = (dist[block] + to_T[:, block]).min(axis=1)
+            better = improves(alt_dist, dist[T])
+            dist[T[better]] = alt_dist[better]
+            pending[better] = True
+        pending[hub[vertices][hub[vertices] >= 0]] = True
+
+    improved(starts)
+    while pending.any():
+        candidates = np.flatnonzero(pending)
+        i = candidates[np.argmin(dist[T[candidates]])]
+        pending[i] = False
+
+        alt_dist = dist[T[i]] + from_T[i]
+        vertices = np.flatnonzero(improves(alt_dist, dist))
+        dist[vertices] = alt_dist[vertices]
+        improved(vertices)
@@ -1,174 +1,322 @@
 from decimal import Decimal
-from math import isclose
 
-from numpy import nan,inf
+import numpy as np
+from numpy import inf
 import heapq
 
+from src.fineman.csr_graph import CSRGraph, to_csr, distance_dtype, infinity, improvement_check
+from src.fineman.priority_queues import search_strategy
 from src.utils import NegativeCycleError
 import src.globals as globals
 
-def dijkstra(graph, neg_edges: set, dist: list, pq, I_prime = None, parent = None, anc_in_I=None, save_source = False):
-
-    for v in graph.keys():
-        if dist[v][0] > dist[v][1]:
-            if globals.WEIGHT_TYPE is float and isclose(dist[v][1], dist[v][0], abs_tol=1e-9):
-                continue
-
-            dist[v][0] = dist[v][1]
-            if globals.WEIGHT_TYPE is Decimal:
-                dist[v][1] = Decimal('Infinity')
-            else:
-                dist[v][1] = inf
-            heapq.heappush(pq, (dist[v][0], v))
-
-    while pq:
-        current_dist, u = heapq.heappop(pq)
-
-        if current_dist > dist[u][0]:
-            continue
-        for v in graph[u]:
-            if (u,v) in neg_edges:
-                continue
-            alt_dist = dist[u][0] + graph[u][v]
-            if alt_dist < dist[v][0]:
-                if globals.WEIGHT_TYPE is float and isclose(alt_dist, dist[v][0], abs_tol=1e-9):
-                    continue
-                dist[v][0] = alt_dist
-                heapq.heappush(pq, (alt_dist, v))
-
-                if save_source:
-                    _compute_ancestor_parent(parent, anc_in_I, I_prime, u,v, len(graph))
+# The functions in this module work on CSRGraph instances natively. Graphs given as nested dictionaries are
+# converted on entry, and results are handed back as lists, dictionaries and sets to keep the dict API intact.
+
+def _like(graph, values):
+    return values.tolist() if isinstance(graph, dict) else values
+
+
+def _negative_entries(values) -> set:
+    return set(np.flatnonzero(np.asarray(values) < 0).tolist())
+
+
+def _initial_distances(n: int, sources):
+    """
+    Creates the distance array used by the traversals, where dist[0] holds the current distances and dist[1] the
+    tentative distances found by a Bellman-Ford round. The sources are placed as tentative distances of zero, such
+    that the first Dijkstra round settles all of them at once - acting as an implicit super source.
+    """
+    dist = np.full((2, n), infinity(), dtype=distance_dtype())
+    dist[1, list(sources)] = Decimal(0) if globals.WEIGHT_TYPE is Decimal else 0
     return dist
 
 
-def bellman_ford(graph, neg_edges: set, dist: list, I_prime = None, anc_in_I = None, parent = None, save_source = False):
+def _dist_from_pairs(dist: list):
+    return np.array([[d[0] for d in dist], [d[1] for d in dist]], dtype=distance_dtype())
+
+
+def _dist_to_pairs(dist_array, dist: list):
+    for v, (current, tentative) in enumerate(zip(dist_array[0].tolist(), dist_array[1].tolist())):
+        dist[v][0] = current
+        dist[v][1] = tentative
+    return dist
+
+
+def _source_arrays(parent, anc_in_I):
+    return tuple(None if a is None else np.asarray(a, dtype=np.int64) for a in (parent, anc_in_I))
+
+
+def _sources_to_lists(arrays, parent, anc_in_I):
+    for array, values in zip(arrays, (parent, anc_in_I)):
+        if values is not None:
+            values[:] = array.tolist()
+
+
+def dijkstra(graph, neg_edges, dist, pq, I_prime = None, parent = None, anc_in_I=None, save_source = False):
+    if isinstance(graph, dict):
+        dist_array = _dist_from_pairs(dist)
+        arrays = _source_arrays(parent, anc_in_I)
+        _dijkstra(to_csr(graph, neg_edges), dist_array, pq, I_prime, *arrays, save_source)
+        _sources_to_lists(arrays, parent, anc_in_I)
+        return _dist_to_pairs(dist_array, dist)
+
+    return _dijkstra(to_csr(graph, neg_edges), dist, pq, I_prime, parent, anc_in_I, save_source)
+
+
+def _dijkstra(graph: CSRGraph, dist, pq, I_prime = None, parent = None, anc_in_I=None, save_source = False,
+              candidates = None):
+    """
+    Runs Dijkstra over the non-negative edges, starting from the vertices whose tentative distance dist[1] improves
+    on their current distance dist[0]. If given, only the vertices in candidates are checked for such improvements.
+    """
+    offsets, targets, weights, neg = graph.lists()
 
-    for (u,v) in neg_edges:
-        alt_dist = dist[u][0] + graph[u][v]
+    starts = np.arange(graph.n) if candidates is None else np.asarray(candidates, dtype=np.int64)
+    starts = starts[improvement_check()(dist[1][starts], dist[0][starts])]
+    dist[0][starts] = dist[1][starts]
+    dist[1][starts] = infinity()
+    pq.extend(zip(dist[0][starts].tolist(), starts.tolist()))
+    heapq.heapify(pq)
 
-        if alt_dist < dist[v][0]:
-            dist[v][1] = min(alt_dist, dist[v][1])
+    current, tentative = dist[0].tolist(), dist[1].tolist()
+    on_relax = None
+    if save_source:
+        parent_array, anc_in_I_array = parent, anc_in_I
+        parent, anc_in_I = parent.tolist(), anc_in_I.tolist()
+        on_relax = lambda u, v, i: _compute_ancestor_parent(parent, anc_in_I, I_prime, u, v)
 
-            if save_source:
-                _compute_ancestor_parent(parent, anc_in_I, I_prime, u,v, len(graph))
+    search_strategy()(offsets, targets, weights, neg, current, pq, on_relax)
 
+    dist[0] = current
+    dist[1] = tentative
+    if save_source:
+        parent_array[:] = parent
+        anc_in_I_array[:] = anc_in_I
     return dist
 
 
-def bfd_save_rounds(super_source, graph, neg_edges, dist: list, beta: int):
+def bellman_ford(graph, neg_edges, dist, I_prime = None, anc_in_I = None, parent = None, save_source = False):
+    if isinstance(graph, dict):
+        dist_array = _dist_from_pairs(dist)
+        arrays = _source_arrays(parent, anc_in_I)
+        _bellman_ford(to_csr(graph, neg_edges), dist_array, I_prime, *arrays, save_source)
+        _sources_to_lists(arrays, parent, anc_in_I)
+        return _dist_to_pairs(dist_array, dist)
+
+    return _bellman_ford(to_csr(graph, neg_edges), dist, I_prime, parent, anc_in_I, save_source)
+
+
+def _bellman_ford(graph: CSRGraph, dist, I_prime = None, parent = None, anc_in_I = None, save_source = False):
+    """
+    Relaxes all negative edges once, as a single batch, writing improvements to the tentative distances dist[1].
+    """
+    u, v, w = graph.neg_edge_arrays()
+    alt_dist = dist[0][u] + w
+    improving = alt_dist < dist[0][v]
+    u, v, alt_dist = u[improving], v[improving], alt_dist[improving]
+
+    if not save_source:
+        np.minimum.at(dist[1], v, alt_dist)
+        return dist
+
+    # keep only the best edge into every vertex, which becomes its parent
+    order = np.lexsort((alt_dist, v))
+    u, v, alt_dist = u[order], v[order], alt_dist[order]
+    first = np.ones(len(v), dtype=bool)
+    first[1:] = v[1:] != v[:-1]
+    u, v, alt_dist = u[first], v[first], alt_dist[first]
+
+    better = alt_dist < dist[1][v]
+    u, v = u[better], v[better]
+    dist[1][v] = alt_dist[better]
+    _compute_ancestor_parent_batch(parent, anc_in_I, I_prime, u, v)
+    return dist
+
+
+def _h_hop(graph: CSRGraph, sources, h: int, I_prime=None, parent=None, anc_in_I=None, save_source=False):
+    dist = _initial_distances(graph.n, sources)
     pq = []
-    heapq.heappush(pq,(dist[super_source][0],super_source))
-    rounds = [[]] * (beta+1)
+    _dijkstra(graph, dist, pq, I_prime, parent, anc_in_I, save_source)
+    for _ in range(h):
+        _bellman_ford(graph, dist, I_prime, parent, anc_in_I, save_source)
+        _dijkstra(graph, dist, pq, I_prime, parent, anc_in_I, save_source)
+    return dist[0]
 
-    dist = dijkstra(graph, neg_edges, dist, pq)
-    rounds[0] = [dist[v][0] for v in graph.keys()]
+
+def _bellman_ford_batch(graph: CSRGraph, dist):
+    """
+    Bellman-Ford round for a batch of searches, where dist[0] and dist[1] hold one row of distances per search.
+
+    :return: the rows and vertices of the improved tentative distances, sorted by row
+    """
+    u, v, w = graph.neg_edge_arrays()
+    alt_dist = dist[0][:, u] + w
+    rows, edges = np.nonzero(alt_dist < dist[0][:, v])
+    np.minimum.at(dist[1], (rows, v[edges]), alt_dist[rows, edges])
+    return rows, v[edges]
+
+
+def bfd_save_rounds(graph, neg_edges, dist, beta: int):
+    """
+    Runs beta rounds of Bellman-Ford/Dijkstra from the distances given in dist, and saves the distances after each
+    round.
+
+    :return: a (beta+1) x n array, where row i holds the distances using at most i negative edges
+    """
+    graph = to_csr(graph, neg_edges)
+    pq = []
+    rounds = np.empty((beta+1, graph.n), dtype=distance_dtype())
+
+    _dijkstra(graph, dist, pq)
+    rounds[0] = dist[0]
 
     for i in range(beta):
-        dist = bellman_ford(graph, neg_edges, dist)
-        dist = dijkstra(graph, neg_edges, dist, pq)
-        rounds[i+1] = [dist[v][0] for v in range(len(graph))]
+        _bellman_ford(graph, dist)
+        _dijkstra(graph, dist, pq)
+        rounds[i+1] = dist[0]
     return rounds
 
 
 def h_hop_sssp(source, graph, neg_edges: set, h: int, I_prime=None, parent=None, anc_in_I=None, save_source=False):
-    if globals.WEIGHT_TYPE is Decimal:
-        dist = [[Decimal('Infinity'),Decimal('Infinity')] for _ in range(len(graph))]
-        dist[source][0] = Decimal(0)
-    else:
-        dist = [[inf,inf] for _ in range(len(graph))]
-        dist[source][0] = 0
-        
+    distances = _h_hop(to_csr(graph, neg_edges), [source], h, I_prime, parent, anc_in_I, save_source)
+    return _like(graph, distances)
+
+def multi_source_h_hop_sssp(sources, graph, neg_edges, h: int):
+    """
+    Computes h-hop distances from every vertex in sources. The searches share a single distance matrix, and each
+    Bellman-Ford round relaxes the negative edges for all of them at once.
+
+    :return: a len(sources) x n matrix, where row i holds the h-hop distances from sources[i]
+    """
+    csr = to_csr(graph, neg_edges)
+    sources = list(sources)
+
+    dist = np.full((2, len(sources), csr.n), infinity(), dtype=distance_dtype())
+    dist[1, np.arange(len(sources)), sources] = Decimal(0) if globals.WEIGHT_TYPE is Decimal else 0
+
     pq = []
-    heapq.heappush(pq,(dist[source][0],source))
-    dist = dijkstra(graph, neg_edges, dist, pq, I_prime, parent, anc_in_I, save_source)
+    for i, source in enumerate(sources):
+        _dijkstra(csr, dist[:, i], pq, candidates=[source])
     for _ in range(h):
-        dist = bellman_ford(graph, neg_edges, dist, I_prime, parent, anc_in_I, save_source)
-        dist = dijkstra(graph, neg_edges, dist, pq, I_prime, parent, anc_in_I, save_source)
-    return [dist[v][0] for v in range(len(graph))]
+        rows, vertices = _bellman_ford_batch(csr, dist)
+        # only the vertices improved by the Bellman-Ford round can start a Dijkstra search
+        bounds = np.searchsorted(rows, np.arange(len(sources) + 1)).tolist()
+        vertices = vertices.tolist()
+        for i in range(len(sources)):
+            _dijkstra(csr, dist[:, i], pq, candidates=vertices[bounds[i]:bounds[i+1]])
+    return _like(graph, dist[0])
 
 def h_hop_stsp(target, graph, t_neg_edges, h: int):
-    t_graph, _ = transpose_graph(graph)
-    return h_hop_sssp(target, t_graph, t_neg_edges, h)
+    t_graph, _ = transpose_graph(to_csr(graph))
+    return _like(graph, h_hop_sssp(target, t_graph, t_neg_edges, h))
 
 def transpose_graph(graph):
-    t_graph = {}
-    t_neg_edges = set()
-
-    for k, neighbors in graph.items():
-        if k not in t_graph:
-            t_graph[k] = {}
+    if isinstance(graph, dict):
+        t_graph = CSRGraph.from_dict(graph).transpose()
+        return t_graph.to_dict(), t_graph.edge_set()
 
-        for v, w in neighbors.items():
-            if v not in t_graph:
-                t_graph[v] = {}
-            
-            t_graph[v][k] = w
-            
-            if w < 0:
-                t_neg_edges.add((v,k))
-
-    return t_graph, t_neg_edges
+    t_graph = graph.transpose()
+    return t_graph, t_graph.neg_mask
 
 
 def _subset_bfd(graph, neg_edges, subset, beta,I_prime=None,save_source=False):
-    super_source = len(graph)
-    graph[super_source] = {}
-    parent = [nan]*len(graph.keys()) if save_source else None
-    anc_in_I = [nan]*len(graph.keys()) if save_source else None
-
-    for v in subset:
-        graph[super_source][v] = 0
+    graph = to_csr(graph, neg_edges)
+    parent = np.full(graph.n, -1) if save_source else None
+    anc_in_I = np.full(graph.n, -1) if save_source else None
 
-    distances = h_hop_sssp(super_source, graph, neg_edges, beta, I_prime, parent, anc_in_I, save_source)
-    del graph[super_source]
+    distances = _h_hop(graph, subset, beta, I_prime, parent, anc_in_I, save_source)
     if save_source:
-        for i in I_prime:
-            if distances[i] < 0 and anc_in_I[i] == i:
-                if globals.WEIGHT_TYPE is float and isclose(distances[i], 0.0, abs_tol = 1e-9):
-                    continue
-                raise NegativeCycleError
+        I_prime = np.fromiter(I_prime, dtype=np.int64, count=len(I_prime))
+        on_cycle = improvement_check()(distances[I_prime], 0) & (anc_in_I[I_prime] == I_prime)
+        if on_cycle.any():
+            raise NegativeCycleError(find_negative_cycle(graph))
     return distances
 
 def subset_bfd(graph, neg_edges, subset, h: int, I_prime=None, save_source=False):
-    return _subset_bfd(graph, neg_edges, subset, h, I_prime, save_source)[:-1]
+    return _like(graph, _subset_bfd(graph, neg_edges, subset, h, I_prime, save_source))
 
 
 def super_source_bfd(graph, neg_edges: set, h: int, cycleDetection = False):
-    distances1 = _subset_bfd(graph, neg_edges, graph.keys(), h)
+    csr = to_csr(graph, neg_edges)
+    distances1 = _subset_bfd(csr, None, range(csr.n), h)
     if cycleDetection:
-        if globals.WEIGHT_TYPE is Decimal:
-            tent_dist = [[distance,Decimal('Infinity')] for distance in distances1]
-        else:
-            tent_dist = [[distance,inf] for distance in distances1]
-        tent_dist = bellman_ford(graph, neg_edges, tent_dist)
-        tent_dist = dijkstra(graph, neg_edges, tent_dist, [])
-        for v in graph.keys():
-            if tent_dist[v][0] < distances1[v]:
-                if globals.WEIGHT_TYPE is float and isclose(tent_dist[v][0], distances1[v], abs_tol=1e-9):
-                    continue
-                raise NegativeCycleError
-
-    return distances1[:-1]
+        tent_dist = np.stack([distances1, np.full(csr.n, infinity(), dtype=distance_dtype())])
+        _bellman_ford(csr, tent_dist)
+        _dijkstra(csr, tent_dist, [])
+        if improvement_check()(tent_dist[0], distances1).any():
+            raise NegativeCycleError(find_negative_cycle(csr))
 
-def get_set_of_neg_vertices(graph):
-    neg_vertices = set()
+    return _like(graph, distances1)
 
-    for vertex, edges in graph.items():
-        for weight in edges.values():
-            if weight < 0:
-                neg_vertices.add(vertex)
-    
-    return neg_vertices
+def find_negative_cycle(graph, sources=None):
+    """
+    Finds a negative cycle reachable from sources, by default from any vertex.
+
+    Bellman-Ford rounds relax all edges at once while keeping the parent of every improved vertex. A cycle in the
+    parent pointers is always negative, and one forms within n rounds if a negative cycle is reachable, so the
+    pointers are checked for a cycle after every round.
+
+    :return: the vertices of the cycle in order, where the first vertex is repeated at the end, or None if there
+    is no negative cycle
+    """
+    graph = to_csr(graph)
+    u, v, w = graph.sources, graph.targets, graph.weights
+    dist = np.full(graph.n, infinity(), dtype=distance_dtype())
+    dist[np.arange(graph.n) if sources is None else list(sources)] = 0
+    parent = np.full(graph.n, -1)
+
+    for _ in range(graph.n):
+        alt_dist = dist[u] + w
+        improving = improvement_check()(alt_dist, dist[v])
+        if not improving.any():
+            return None
+
+        # keep only the best edge into every vertex, which becomes its parent
+        order = np.lexsort((alt_dist[improving], v[improving]))
+        best_u, best_v, best_dist = u[improving][order], v[improving][order], alt_dist[improving][order]
+        first = np.ones(len(best_v), dtype=bool)
+        first[1:] = best_v[1:] != best_v[:-1]
+        dist[best_v[first]] = best_dist[first]
+        parent[best_v[first]] = best_u[first]
+
+        cycle = _parent_cycle(parent)
+        if cycle is not None:
+            return cycle
+    return None
+
+def _parent_cycle(parent):
+    """
+    Returns a cycle of the parent pointers in edge direction, closed by repeating its first vertex, or None.
+    """
+    # after the doublings ancestor[x] is the 2^k-th ancestor of x for 2^k > n, which lies on a cycle if it exists
+    ancestor = parent.copy()
+    for _ in range(len(parent).bit_length()):
+        reached = ancestor >= 0
+        ancestor[reached] = ancestor[ancestor[reached]]
+
+    on_cycle = ancestor[ancestor >= 0]
+    if not len(on_cycle):
+        return None
+
+    start = int(on_cycle[0])
+    cycle = [start]
+    vertex = int(parent[start])
+    while vertex != start:
+        cycle.append(vertex)
+        vertex = int(parent[vertex])
+    cycle.reverse()
+    return cycle + [cycle[0]]
+
+def get_set_of_neg_vertices(graph):
+    graph = to_csr(graph)
+    return set(np.unique(graph.sources[graph.weights < 0]).tolist())
 
 
 def find_betweenness_set(source, target, graph, neg_edges, t_neg_edges, h: int):
-    dist1 = h_hop_sssp(source, graph, neg_edges, h)
+    graph = to_csr(graph, neg_edges)
+    dist1 = h_hop_sssp(source, graph, None, h)
     dist2 = h_hop_stsp(target, graph, t_neg_edges, h)
-    between = set()
-    for x in graph.keys():
-        if dist1[x]+dist2[x] < 0:
-            between.add(x)
-    return between
+    return _negative_entries(dist1 + dist2)
 
 def betweenness(source, target, graph, neg_edges, t_neg_edges, h: int):
     return len(find_betweenness_set(source, target, graph, neg_edges, t_neg_edges, h))
@@ -185,64 +333,34 @@ def reweight_graph(graph, new_price_function: list[int], with_transpose = False)
     :return: the graph reweighted in new_price_function, a set of the negative edges, and if with_transpose the
     reweighted graph transposed.
     """
-    new_graph = {}
-    new_neg_edges = set()
-
-    if with_transpose:
-        new_graph_T = {}
-
-    for u, edges in graph.items():
-
-        if u not in new_graph:
-            new_graph[u] = {}
+    new_graph = to_csr(graph).reweight(new_price_function)
 
-        if with_transpose and u not in new_graph_T:
-            new_graph_T[u] = {}
-
-        for v, w in edges.items():
-            new_weight = w + new_price_function[u] - new_price_function[v]
-            if globals.WEIGHT_TYPE is float and isclose(new_weight, 0, abs_tol = 1e-9):
-                new_weight = 0
-            new_graph[u][v] = new_weight
-
-            if with_transpose:
-                if v not in new_graph_T: new_graph_T[v] = {}
-                new_graph_T[v][u] = new_graph[u][v]
-
-            if new_graph[u][v] < 0:
-                new_neg_edges.add((u, v))
+    if isinstance(graph, dict):
+        if with_transpose:
+            return new_graph.to_dict(), new_graph.edge_set(), new_graph.transpose().to_dict()
+        return new_graph.to_dict(), new_graph.edge_set()
 
     if with_transpose:
-        return new_graph, new_neg_edges, new_graph_T
-    else:
-        return new_graph, new_neg_edges
+        return new_graph, new_graph.neg_mask, new_graph.transpose()
+    return new_graph, new_graph.neg_mask
 
 def compute_reach(graph, neg_edges, subset, h):
-    d = subset_bfd(graph, neg_edges, subset, h)
-    return {v for v in graph.keys() if d[v] < 0}
-
-def _compute_ancestor_parent(parent, anc_in_I, I_prime, u: int,v: int, super_source: int):
-    if u == super_source:
-        return
+    return _negative_entries(_subset_bfd(graph, neg_edges, subset, h))
 
+def _compute_ancestor_parent(parent, anc_in_I, I_prime, u: int,v: int):
     parent[v] = u
     if parent[v] in I_prime and v not in I_prime:
         anc_in_I[v] = parent[v]
     else:
         anc_in_I[v] = anc_in_I[parent[v]]
 
+def _compute_ancestor_parent_batch(parent, anc_in_I, I_prime, u: np.ndarray, v: np.ndarray):
+    in_I = np.zeros(len(parent), dtype=bool)
+    in_I[list(I_prime)] = True
+
+    parent[v] = u
+    anc_in_I[v] = np.where(in_I[u] & ~in_I[v], u, anc_in_I[u])
+
 def super_source_bfd_save_rounds(graph, neg_edges, subset, h: int):
-    super_source = len(graph)
-    graph[super_source] = {}
-    for v in subset:
-        graph[super_source][v] = 0
-
-    if globals.WEIGHT_TYPE is Decimal:
-        dist = [[Decimal('Infinity'),Decimal('Infinity')] for _ in range(len(graph))]
-        dist[super_source][0] = Decimal(0)
-    else:
-        dist = [[inf,inf] for _ in range(len(graph))]
-        dist[super_source][0] = 0
-    dists = bfd_save_rounds(super_source, graph, neg_edges, dist, h)
-    del graph[super_source]
-    return [lst[:-1] for lst in dists]
+    csr = to_csr(graph, neg_edges)
+    return _like(graph, bfd_save_rounds(csr, None, _initial_distances(csr.n, subset), h))
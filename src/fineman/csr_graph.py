@@ -0,0 +1,403 @@
+from bisect import bisect_left
+from decimal import Decimal
+
+import numpy as np
+from numpy import inf
+
+import src.globals as globals
+
+
+def weight_dtype():
+    """
+    Returns the NumPy dtype used to store edge weights of the current weight type.
+    """
+    weight_type = globals.WEIGHT_TYPE
+    if weight_type is Decimal:
+        return object
+    if weight_type is int:
+        return np.int64
+    return np.float64
+
+
+def distance_dtype():
+    """
+    Returns the NumPy dtype used to store distances, which unlike weights must be able to hold infinity.
+    """
+    return object if globals.WEIGHT_TYPE is Decimal else np.float64
+
+
+def infinity():
+    return Decimal('Infinity') if globals.WEIGHT_TYPE is Decimal else inf
+
+
+def _exact_improvements(new, old) -> np.ndarray:
+    return np.asarray(new < old)
+
+
+def _tolerant_improvements(new, old) -> np.ndarray:
+    # vectorized counterpart of new < old and not math.isclose(new, old, abs_tol=1e-9)
+    new, old = np.asarray(new, dtype=np.float64), np.asarray(old, dtype=np.float64)
+    with np.errstate(invalid="ignore"):
+        difference = np.abs(new - old)
+        close = difference <= np.maximum(1e-9 * np.maximum(np.abs(new), np.abs(old)), 1e-9)
+    return (new < old) & ~(close & np.isfinite(difference))
+
+
+def improvement_check():
+    """
+    Returns the function computing which entries of new improve on old for the current weight type, where float
+    improvements within 1e-9 are ignored as rounding errors.
+    """
+    return _tolerant_improvements if globals.WEIGHT_TYPE is float else _exact_improvements
+
+
+def concatenated_ranges(starts, lengths) -> np.ndarray:
+    """
+    Returns the concatenated index ranges starts[i]:starts[i]+lengths[i].
+    """
+    ends = np.cumsum(lengths)
+    return np.arange(ends[-1] if len(ends) else 0) + np.repeat(starts - ends + lengths, lengths)
+
+
+def _ranges(offsets, vertices) -> np.ndarray:
+    """
+    Returns the concatenated index ranges offsets[v]:offsets[v+1] of the given vertices.
+    """
+    starts = offsets[vertices]
+    return concatenated_ranges(starts, offsets[vertices + 1] - starts)
+
+
+# reweightings with a price function that is nonzero on at most this fraction of the vertices update the weights
+# and negative edges of the previous graph instead of recomputing them
+INCREMENTAL_REWEIGHT_FRACTION = 0.25
+
+
+class NegativeEdgeIndex:
+    """
+    The edges of negative weight of a graph, with their count and the negative out-degree of every vertex.
+
+    Reweighting only changes the weights of edges incident to vertices with a nonzero price, so the index of a
+    reweighted graph is derived from the previous index by updating those edges alone.
+    """
+
+    __slots__ = ("mask", "count", "out_degree")
+
+    def __init__(self, mask: np.ndarray, count: int, out_degree: np.ndarray):
+        self.mask = mask
+        self.count = count
+        self.out_degree = out_degree
+
+    @classmethod
+    def from_weights(cls, weights, sources, n: int):
+        mask = weights < 0
+        return cls(mask, int(np.count_nonzero(mask)), np.bincount(sources[mask], minlength=n))
+
+    def updated(self, edges: np.ndarray, negative: np.ndarray, sources):
+        """
+        Returns the index after the given edges were reweighted, where negative tells which of them are negative now.
+        """
+        was_negative = self.mask[edges]
+        mask = self.mask.copy()
+        mask[edges] = negative
+
+        out_degree = self.out_degree.copy()
+        np.add.at(out_degree, sources[edges], negative.astype(np.int64) - was_negative)
+        count = self.count + int(np.count_nonzero(negative)) - int(np.count_nonzero(was_negative))
+        return NegativeEdgeIndex(mask, count, out_degree)
+
+    def vertices(self) -> set:
+        return set(np.flatnonzero(self.out_degree).tolist())
+
+
+class CSRGraph:
+    """
+    A directed graph stored in compressed sparse row (CSR) form.
+
+    The out-edges of vertex u occupy the index range offsets[u]:offsets[u+1] of targets, weights and
+    neg_mask, and every row is sorted by target, so transposing a graph twice reproduces its edge order.
+    neg_mask marks the edges the hop-bounded searches treat as negative, which defaults to the edges of
+    negative weight but may be any subset of the edges (e.g. all edges out of an independent set).
+
+    Reweighting a graph does not copy it. The result is a view storing the base weights of the original graph and
+    the cumulative price function (potential) of all reweightings, and its weights are only computed when used.
+    """
+
+    __slots__ = ("offsets", "targets", "base_weights", "potential", "_weights", "_neg_mask", "_neg_index",
+                 "_topology", "_weight_list", "_neg_list", "_neg_edges", "_transpose")
+
+    def __init__(self, offsets, targets, weights, neg_mask=None, potential=None, _topology=None):
+        self.offsets = offsets
+        self.targets = targets
+        self.base_weights = weights
+        self.potential = potential
+        self._weights = weights if potential is None else None
+        self._neg_mask = neg_mask
+        self._neg_index = None
+        # data derived from the topology is shared between all views of the same offsets and targets
+        self._topology = {} if _topology is None else _topology
+        self._weight_list = None
+        self._neg_list = None
+        self._neg_edges = None
+        self._transpose = None
+
+    @property
+    def n(self):
+        return len(self.offsets) - 1
+
+    @property
+    def m(self):
+        return len(self.targets)
+
+    def __len__(self):
+        return self.n
+
+    @property
+    def sources(self):
+        """
+        The source vertex of every edge, i.e. the row index expanded to one entry per edge.
+        """
+        if "sources" not in self._topology:
+            self._topology["sources"] = np.repeat(np.arange(self.n), np.diff(self.offsets))
+        return self._topology["sources"]
+
+    @property
+    def weights(self):
+        """
+        The edge weights, i.e. the base weights reweighted by the potential, w(u,v) + phi(u) - phi(v).
+        """
+        if self._weights is None:
+            weights = self.base_weights + self.potential[self.sources] - self.potential[self.targets]
+            if globals.WEIGHT_TYPE is float:
+                weights[np.abs(weights) <= 1e-9] = 0
+            self._weights = weights
+        return self._weights
+
+    @property
+    def neg_mask(self):
+        if self._neg_mask is None:
+            return self.negative_edge_index().mask
+        return self._neg_mask
+
+    def negative_edge_index(self) -> NegativeEdgeIndex:
+        """
+        Returns the index of the edges of negative weight, which neg_mask defaults to.
+        """
+        if self._neg_index is None:
+            self._neg_index = NegativeEdgeIndex.from_weights(self.weights, self.sources, self.n)
+        return self._neg_index
+
+    @property
+    def neg_count(self) -> int:
+        """
+        The number of negative edges, i.e. of edges in neg_mask.
+        """
+        if self._neg_mask is None:
+            return self.negative_edge_index().count
+        return int(np.count_nonzero(self._neg_mask))
+
+    def neg_vertices(self) -> set:
+        """
+        Returns the vertices with an outgoing negative edge, i.e. an outgoing edge in neg_mask.
+        """
+        if self._neg_mask is None:
+            return self.negative_edge_index().vertices()
+        return set(self.sources[self._neg_mask].tolist())
+
+    @classmethod
+    def from_edges(cls, n: int, sources, targets, weights, neg_mask=None):
+        """
+        Builds a graph on the vertices 0..n-1 from parallel edge arrays given in any order.
+        """
+        sources = np.asarray(sources, dtype=np.int64)
+        targets = np.asarray(targets, dtype=np.int64)
+        weights = np.asarray(weights)
+
+        order = np.lexsort((targets, sources))
+        offsets = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(np.bincount(sources, minlength=n), out=offsets[1:])
+
+        graph = cls(offsets, targets[order], weights[order],
+                    None if neg_mask is None else np.asarray(neg_mask, dtype=bool)[order])
+        graph._topology["sources"] = sources[order]
+        return graph
+
+    @classmethod
+    def from_dict(cls, graph: dict[int, dict[int, float]], neg_edges: set = None):
+        """
+        Converts a nested dictionary graph into CSR form.
+
+        :param graph: the graph as a mapping from each vertex to a mapping of its neighbors to edge weights
+        :param neg_edges: optional set of (u, v) pairs to use as negative edges instead of the edges of negative weight
+
+        :return: the graph in CSR form
+        """
+        vertices = np.fromiter(graph.keys(), dtype=np.int64, count=len(graph))
+        degrees = np.fromiter((len(edges) for edges in graph.values()), dtype=np.int64, count=len(graph))
+        sources = np.repeat(vertices, degrees)
+        targets = np.fromiter((v for edges in graph.values() for v in edges), dtype=np.int64, count=len(sources))
+        weights = np.array([w for edges in graph.values() for w in edges.values()], dtype=weight_dtype())
+
+        n = int(max(vertices.max(initial=-1), targets.max(initial=-1))) + 1
+        csr = cls.from_edges(n, sources, targets, weights)
+        if neg_edges is not None:
+            return csr.with_neg_mask(neg_edges)
+        return csr
+
+    def to_dict(self) -> dict[int, dict[int, float]]:
+        offsets, targets, weights, _ = self.lists()
+        return {u: {targets[i]: weights[i] for i in range(offsets[u], offsets[u+1])} for u in range(self.n)}
+
+    def edge_set(self, mask=None) -> set:
+        """
+        Returns the edges selected by mask as a set of (u, v) pairs, by default the negative edges.
+        """
+        mask = self.neg_mask if mask is None else mask
+        return set(zip(self.sources[mask].tolist(), self.targets[mask].tolist()))
+
+    def edge_mask(self, edges) -> np.ndarray:
+        """
+        Returns the boolean edge mask selecting the (u, v) pairs in edges.
+        """
+        offsets, targets, _, _ = self.lists()
+        n = self.n
+        mask = np.zeros(self.m, dtype=bool)
+        for u, v in edges:
+            if u >= n:
+                continue
+            # rows are sorted by target, so the edge can be found by binary search
+            i = bisect_left(targets, v, offsets[u], offsets[u+1])
+            if i < offsets[u+1] and targets[i] == v:
+                mask[i] = True
+        return mask
+
+    def out_edge_mask(self, vertices) -> np.ndarray:
+        """
+        Returns the boolean edge mask selecting every edge leaving one of the given vertices.
+        """
+        selected = np.zeros(self.n, dtype=bool)
+        selected[list(vertices)] = True
+        return selected[self.sources]
+
+    def with_neg_mask(self, neg_edges):
+        """
+        Returns a view of this graph sharing its arrays, but with another set of negative edges.
+
+        :param neg_edges: a boolean edge mask or a set of (u, v) pairs
+        """
+        if not isinstance(neg_edges, np.ndarray):
+            neg_edges = self.edge_mask(neg_edges)
+
+        view = CSRGraph(self.offsets, self.targets, self.base_weights, neg_edges, self.potential, self._topology)
+        view._weights = self._weights
+        view._weight_list = self._weight_list
+        view._neg_index = self._neg_index
+        return view
+
+    def neighbors(self, u: int) -> np.ndarray:
+        return self.targets[self.offsets[u]:self.offsets[u+1]]
+
+    def _transposed_topology(self):
+        """
+        Returns the edge permutation of the transpose along with its offsets, targets and topology, which are
+        computed once and shared by all views of this topology.
+        """
+        if "transpose" not in self._topology:
+            order = np.lexsort((self.sources, self.targets))
+            offsets = np.zeros(self.n + 1, dtype=np.int64)
+            np.cumsum(np.bincount(self.targets, minlength=self.n), out=offsets[1:])
+
+            t_topology = {"sources": self.targets[order]}
+            # rows are sorted, so transposing the transpose reproduces the edge order of this topology
+            t_topology["transpose"] = (np.argsort(order), self.offsets, self.targets, self._topology)
+            self._topology["transpose"] = (order, offsets, self.sources[order], t_topology)
+        return self._topology["transpose"]
+
+    def transpose(self):
+        """
+        Returns the transposed graph, where the negative edges are the reversed negative edges of this graph. Views
+        never change, so the transpose is computed once per view, and its transpose is this graph.
+        """
+        if self._transpose is None:
+            order, offsets, targets, topology = self._transposed_topology()
+            t_graph = CSRGraph(offsets, targets, self.weights[order], self.neg_mask[order], None, topology)
+            t_graph._transpose = self
+            self._transpose = t_graph
+        return self._transpose
+
+    def reweight(self, price_function):
+        """
+        Returns the graph with w(u,v) replaced by w(u,v) + phi(u) - phi(v), whose negative edges are the edges
+        of negative weight after reweighting. The result is a view sharing the topology and base weights of this
+        graph, where phi is added to the potential of this graph, so reweighting copies no edge data.
+
+        If the weights of this graph are already computed and phi is only nonzero on a few vertices, the weights and
+        the negative edge index of the result are updated for the edges incident to those vertices only.
+        """
+        phi = np.asarray(price_function)
+        if phi.dtype != self.base_weights.dtype:
+            phi = phi.astype(self.base_weights.dtype)
+
+        potential = phi if self.potential is None else self.potential + phi
+        graph = CSRGraph(self.offsets, self.targets, self.base_weights, None, potential, self._topology)
+
+        changed = np.flatnonzero(phi)
+        if self._weights is not None and len(changed) <= self.n * INCREMENTAL_REWEIGHT_FRACTION:
+            order, t_offsets, _, _ = self._transposed_topology()
+            edges = np.union1d(_ranges(self.offsets, changed), order[_ranges(t_offsets, changed)])
+
+            changed_weights = self.base_weights[edges] + potential[self.sources[edges]] - potential[self.targets[edges]]
+            if globals.WEIGHT_TYPE is float:
+                changed_weights[np.abs(changed_weights) <= 1e-9] = 0
+            graph._weights = self._weights.copy()
+            graph._weights[edges] = changed_weights
+            graph._neg_index = self.negative_edge_index().updated(edges, changed_weights < 0, self.sources)
+
+        return graph
+
+    def edge_subgraph(self, keep: np.ndarray, neg_mask=None):
+        """
+        Returns the graph on the same vertices containing only the edges selected by keep.
+
+        :param keep: boolean mask of the edges to keep
+        :param neg_mask: negative edges of the subgraph, by default the kept negative edges of this graph
+        """
+        offsets = np.zeros(self.n + 1, dtype=np.int64)
+        np.cumsum(np.bincount(self.sources[keep], minlength=self.n), out=offsets[1:])
+
+        subgraph = CSRGraph(offsets, self.targets[keep], self.weights[keep],
+                            self.neg_mask[keep] if neg_mask is None else neg_mask)
+        subgraph._topology["sources"] = self.sources[keep]
+        return subgraph
+
+    def neg_edge_arrays(self):
+        """
+        Returns the negative edges as parallel arrays of sources, targets and weights.
+        """
+        if self._neg_edges is None:
+            self._neg_edges = (self.sources[self.neg_mask], self.targets[self.neg_mask], self.weights[self.neg_mask])
+        return self._neg_edges
+
+    def lists(self):
+        """
+        Returns offsets, targets, weights and the negative edge mask as Python lists, which are considerably
+        faster than NumPy arrays to index element by element in the traversal loops.
+        """
+        if "lists" not in self._topology:
+            self._topology["lists"] = (self.offsets.tolist(), self.targets.tolist())
+        if self._weight_list is None:
+            self._weight_list = self.weights.tolist()
+        if self._neg_list is None:
+            self._neg_list = self.neg_mask.tolist()
+        return (*self._topology["lists"], self._weight_list, self._neg_list)
+
+
+def to_csr(graph, neg_edges=None) -> CSRGraph:
+    """
+    Returns graph in CSR form with neg_edges as its negative edges. Dict graphs are converted, while CSR graphs
+    are returned as they are unless another set of negative edges is given.
+    """
+    if isinstance(graph, CSRGraph):
+        if neg_edges is None or neg_edges is graph.neg_mask:
+            return graph
+        return graph.with_neg_mask(neg_edges)
+    return CSRGraph.from_dict(graph, neg_edges)
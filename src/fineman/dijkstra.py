@@ -1,25 +1,39 @@
 from numpy import inf
-import heapq
 
-def dijkstra(graph, source, org_graph):
-    dist = [inf] * (len(graph.keys()))
+from src.fineman.csr_graph import CSRGraph
+from src.fineman.priority_queues import search_strategy
+
+def dijkstra(graph, source, org_graph, with_parent = False):
+    """
+    Runs Dijkstra's algorithm on graph, a nonnegative reweighting of org_graph, and returns the distances in
+    org_graph. With with_parent, the parent of every vertex in the shortest path tree (-1 for the source and
+    unreachable vertices) is returned as well.
+    """
+    if isinstance(graph, dict):
+        return dijkstra(CSRGraph.from_dict(graph), source, CSRGraph.from_dict(org_graph), with_parent)
+
+    # graph is a reweighting of org_graph, so their edges share indices
+    offsets, targets, weights, _ = graph.lists()
+    org_weights = org_graph.lists()[2]
+
+    dist = [inf] * graph.n
     dist[source] = 0
-    pq = []
-    heapq.heappush(pq, (dist[source], source))
 
-    org_dist = [inf] * (len(graph.keys()))
+    org_dist = [inf] * graph.n
     org_dist[source] = 0
 
-    while pq:
-        current_dist, u = heapq.heappop(pq)
-        if current_dist > dist[u]:
-            continue
+    parent = [-1] * graph.n
+
+    def relax(u, v, i):
+        org_dist[v] = org_dist[u] + org_weights[i]
+
+    def relax_with_parent(u, v, i):
+        org_dist[v] = org_dist[u] + org_weights[i]
+        parent[v] = u
 
-        for v in graph[u]:
-            alt_dist = dist[u] + graph[u][v]
-            if alt_dist < dist[v]:
-                org_dist[v] = org_dist[u] + org_graph[u][v]
-                dist[v] = alt_dist
-                heapq.heappush(pq, (alt_dist, v))
+    search_strategy(tolerant=False)(offsets, targets, weights, [False] * graph.m, dist, [(0, source)],
+                                    relax_with_parent if with_parent else relax)
 
+    if with_parent:
+        return org_dist, parent
     return org_dist
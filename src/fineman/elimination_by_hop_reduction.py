@@ -1,111 +1,157 @@
-from math import ceil
+from heapq import heapify, heappop, heappush
+from math import ceil, isclose
 
-from src.fineman.core_functions import super_source_bfd_save_rounds, super_source_bfd
+import numpy as np
 
+from src.fineman.core_functions import find_negative_cycle, super_source_bfd_save_rounds, super_source_bfd, _like, \
+    _negative_entries
+from src.fineman.csr_graph import CSRGraph, to_csr, distance_dtype, improvement_check, infinity
+from src.utils import NegativeCycleError
+import src.globals as globals
 
-def _elimination_by_hop_reduction(graph: dict[int, dict[int, float]], neg_edge_subset: set, r):
 
-    k_hat = len(neg_edge_subset)
-    dists = super_source_bfd_save_rounds(graph, neg_edge_subset, graph.keys(), r)
+def _elimination_by_hop_reduction(graph, neg_edge_subset, r):
 
-    R_set = {v for v in graph.keys() if dists[r][v] < 0}
+    csr = to_csr(graph, neg_edge_subset)
+    k_hat = np.count_nonzero(csr.neg_mask)
+    dists = super_source_bfd_save_rounds(csr, csr.neg_mask, range(csr.n), r)
 
-    h, h_neg_edges, mapping = construct_h(graph, neg_edge_subset, dists, R_set, r)
+    R_set = _negative_entries(dists[r])
 
     kappa = ceil(k_hat / r)
 
-    h_distances = super_source_bfd(h, h_neg_edges, kappa, cycleDetection=True)
-
-    g_distances = [0] * len(graph)
-    for v in graph.keys():
-        g_distances[v] = h_distances[mapping[(v,0)]]
-
-    return g_distances
-
-
-
-def construct_h(graph, neg_edges, dists, R_set, r):
-    h = {}
-    mapping = {}
-
-    for v in graph:
-        if v in R_set:
-            for i in range(r+1):
-                idx = len(h.keys())
-                mapping[(v,i)] = idx
-                h[idx] = {}
-        else:
-            idx = len(h.keys())
-            mapping[(v,0)] = idx
-            h[idx] = {}
-
-    h_neg_edges = set()
-
-    for u, edges in graph.items():
-        for v in edges.keys():
-            # case 1
-            if (u,v) not in neg_edges and u in R_set and v in R_set:
-                for j in range(r+1):
-                    h[mapping[(u,j)]][mapping[(v,j)]] = _compute_weight(j, u, j, v, graph, dists)
-                    _construct_neg_edges_set(h, h_neg_edges, mapping[(u,j)], mapping[(v,j)])
-
-            # case 2
-            if (u,v) in neg_edges and u in R_set and v in R_set:
-                for j in range(r):
-                    h[mapping[(u,j)]][mapping[(v,j+1)]] = _compute_weight(j, u, j+1, v, graph, dists)
-                    _construct_neg_edges_set(h, h_neg_edges, mapping[(u,j)], mapping[(v,j+1)])
-
-            # case 3
-            if (u,v) not in neg_edges and u in R_set and v not in R_set:
-                for j in range(r+1):
-                    h[mapping[(u,j)]][mapping[(v,0)]] = _compute_weight(j, u, 0, v, graph, dists)
-                    _construct_neg_edges_set(h, h_neg_edges, mapping[(u,j)], mapping[(v,0)])
-
-            # case 4
-            if (u,v) in neg_edges and u in R_set and v not in R_set:
-                for j in range(r):
-                    h[mapping[(u,j)]][mapping[(v,0)]] = _compute_weight(j, u, 0, v, graph, dists)
-                    _construct_neg_edges_set(h, h_neg_edges, mapping[(u,j)], mapping[(v,0)])
-
-            # case 5
-            if (u,v) not in neg_edges and u not in R_set and v in R_set:
-                h[mapping[(u,0)]][mapping[(v,0)]] = _compute_weight(0, u, 0, v, graph, dists)
-                _construct_neg_edges_set(h, h_neg_edges, mapping[(u,0)], mapping[(v,0)])
-
-            # case 6
-            if (u,v) in neg_edges and u not in R_set and v in R_set:
-                h[mapping[(u,0)]][mapping[(v,1)]] = _compute_weight(0, u, 1, v, graph, dists)
-                _construct_neg_edges_set(h, h_neg_edges, mapping[(u,0)], mapping[(v,1)])
-
-            # case 7
-            if (u,v) not in neg_edges and u not in R_set and v not in R_set:
-                h[mapping[(u,0)]][mapping[(v,0)]] = _compute_weight(0, u, 0, v, graph, dists)
-                _construct_neg_edges_set(h, h_neg_edges, mapping[(u,0)], mapping[(v,0)])
-
-            #case 8
-            if (u,v) in neg_edges and u not in R_set and v not in R_set:
-                h[mapping[(u,0)]][mapping[(v,0)]] = _compute_weight(0, u, 0, v, graph, dists)
-                _construct_neg_edges_set(h, h_neg_edges, mapping[(u,0)], mapping[(v,0)])
-
-
-    for u in R_set:
-        # case 9
-        for j in range(r+1):
-            if j == r:
-                h[mapping[(u,j)]][mapping[(u,0)]] = _compute_weight(j, u, 0, u, graph, dists)
-                _construct_neg_edges_set(h, h_neg_edges, mapping[(u,j)], mapping[(u,0)])
+    # H is never built: the search below derives its edges from G and the saved rounds
+    h_distances = _implicit_h_bfd(csr, dists, R_set, r, kappa)
+
+    return _like(graph, h_distances)
+
+
+def _implicit_h_bfd(graph: CSRGraph, dists, R_set, r, h):
+    """
+    Runs super_source_bfd with cycle detection on the graph H without constructing it. In H every vertex v in R_set
+    is copied into r+1 layers (v,0),...,(v,r) and every other vertex only appears as (v,0). An edge of G is taken
+    in all layers of its source, and a negative edge moves one layer up when it enters a vertex of R_set, where the
+    negative edges out of (v,r) are dropped. The copies of a vertex of R_set form a cycle (v,0) -> ... -> (v,r) ->
+    (v,0), and all edges are reweighted by the layer distances in dists.
+
+    The vertex (v,j) of H is the index j*n + v, where (v,j) for j > 0 only exists if v is in R_set. Only the
+    negative edges of H are materialized, one layer at a time, and the Dijkstra searches generate the other edges
+    on demand.
+
+    :return: the distances of the vertices (v,0)
+    """
+    n = graph.n
+    in_R = np.zeros(n, dtype=bool)
+    in_R[list(R_set)] = True
+    layer_dists = _layer_distances(dists, r+1, n)
+
+    exists = np.zeros((r+1, n), dtype=bool)
+    exists[0] = True
+    exists[1:, in_R] = True
+    dist = np.full((r+1) * n, infinity(), dtype=distance_dtype())
+    dist[exists.reshape(-1)] = globals.WEIGHT_TYPE(0)
+
+    h_u, h_v, h_w = _implicit_h_neg_edges(graph, in_R, layer_dists, r)
+    offsets, targets, weights, neg = graph.lists()
+    kernel = (offsets, targets, weights, neg, in_R.tolist(), layer_dists.tolist(), n, r)
+    tolerant = globals.WEIGHT_TYPE is float
+
+    # every vertex of H starts at distance 0, which no nonnegative edge improves, so the first Dijkstra is skipped
+    for i in range(h+1):
+        tentative = np.full(len(dist), infinity(), dtype=distance_dtype())
+        np.minimum.at(tentative, h_v, dist[h_u] + h_w)
+        starts = np.flatnonzero(improvement_check()(tentative, dist))
+        if not len(starts):
+            break
+        if i == h:
+            # a negative cycle of H is a negative closed walk of G, as the layer distances telescope
+            raise NegativeCycleError(find_negative_cycle(graph))
+
+        dist[starts] = tentative[starts]
+        current = dist.tolist()
+        pq = list(zip(dist[starts].tolist(), starts.tolist()))
+        heapify(pq)
+        _layered_search(*kernel, current, pq, tolerant)
+        dist = np.array(current, dtype=distance_dtype())
+
+    return dist[:n]
+
+
+def _layer_distances(dists, rows, n):
+    """
+    Returns the first rows rounds of dists as a 2-D array, without copying the array of bfd_save_rounds.
+    """
+    if isinstance(dists, np.ndarray):
+        return dists[:rows, :n]
+    return np.array([np.asarray(dists[i][:n]) for i in range(rows)])
+
+
+def _implicit_h_neg_edges(graph: CSRGraph, in_R, layer_dists, r):
+    """
+    Returns the negative edges of H as arrays of sources, targets and weights in the vertex indices of
+    _implicit_h_bfd, computed one layer at a time.
+    """
+    n = graph.n
+    u, v, w, neg = graph.sources, graph.targets, graph.weights, graph.neg_mask
+    R = np.flatnonzero(in_R)
+    sources, targets, weights = [], [], []
+
+    for j in range(r+1):
+        active = (in_R[u] | (j == 0)) & ~(neg & in_R[u] & (j == r))
+        su, sv = u[active], v[active]
+        target_layer = np.where(in_R[sv], j + neg[active], 0)
+        layer_weights = w[active] + layer_dists[j][su] - layer_dists[target_layer, sv]
+        negative = layer_weights < 0
+        sources.append(j * n + su[negative])
+        targets.append(target_layer[negative] * n + sv[negative])
+        weights.append(layer_weights[negative])
+
+        next_layer = (j + 1) % (r+1)
+        cycle_weights = layer_dists[j][R] - layer_dists[next_layer][R]
+        negative = cycle_weights < 0
+        sources.append(j * n + R[negative])
+        targets.append(next_layer * n + R[negative])
+        weights.append(cycle_weights[negative])
+
+    return np.concatenate(sources), np.concatenate(targets), np.concatenate(weights)
+
+
+def _layered_search(offsets, targets, weights, neg, in_R, layer_dists, n, r, dist, pq, tolerant):
+    """
+    Dijkstra over the nonnegative edges of H, generated from the edges of G: an edge (u,v) leaves (u,j) for (v,j),
+    or (v,j+1) if it is negative, where vertices outside R_set only have layer 0, and (u,j) of a vertex in R_set
+    also has the edge to (u,j+1 mod r+1). Edges are reweighted by the layer distances.
+    """
+    while pq:
+        current_dist, x = heappop(pq)
+        if current_dist > dist[x]:
+            continue
+        j, u = divmod(x, n)
+        phi_u = layer_dists[j][u]
+        u_in_R = in_R[u]
+
+        for i in range(offsets[u], offsets[u+1]):
+            v = targets[i]
+            if neg[i]:
+                if u_in_R and j == r:
+                    continue
+                t = j + 1 if in_R[v] else 0
             else:
-                h[mapping[(u,j)]][mapping[(u,j+1)]] = _compute_weight(j, u, j+1, u, graph, dists)
-                _construct_neg_edges_set(h, h_neg_edges, mapping[(u,j)], mapping[(u,j+1)])
-
-    return h, h_neg_edges, mapping
-
-
-def _compute_weight(i, u, j, v, graph, dists):
-    weight = 0 if u == v else graph[u][v]
-    return weight + (dists[i][u]) - (dists[j][v])
-
-
-def _construct_neg_edges_set(graph, cur_set, u, v):
-    if graph[u][v] < 0:
-        cur_set.add((u,v))
\ No newline at end of file
+                t = j if in_R[v] else 0
+            w = weights[i] + phi_u - layer_dists[t][v]
+            if w < 0:
+                continue
+            y = t * n + v
+            alt_dist = current_dist + w
+            if alt_dist < dist[y] and not (tolerant and isclose(alt_dist, dist[y], abs_tol=1e-9)):
+                dist[y] = alt_dist
+                heappush(pq, (alt_dist, y))
+
+        if u_in_R:
+            t = (j + 1) % (r+1)
+            w = phi_u - layer_dists[t][u]
+            y = t * n + u
+            alt_dist = current_dist + w
+            if w >= 0 and alt_dist < dist[y] and not (tolerant and isclose(alt_dist, dist[y], abs_tol=1e-9)):
+                dist[y] = alt_dist
+                heappush(pq, (alt_dist, y))
@@ -0,0 +1,110 @@
+from heapq import heapify
+from math import ceil, isclose, log
+
+import numpy as np
+
+from src.fineman.betweenness_reduction import SAMPLING_CONSTANT
+from src.fineman.core_functions import find_negative_cycle
+from src.fineman.csr_graph import CSRGraph, distance_dtype
+from src.fineman.priority_queues import search_strategy
+from src.utils import NegativeCycleError
+import src.globals as globals
+
+# Practical alternatives to the elimination rounds of Fineman's algorithm. An engine takes the preprocessed graph
+# and returns a reweighting of it without negative edges, raising NegativeCycleError if there is none, so
+# fineman() answers the queries with the same final Dijkstra search whichever engine computed the potential.
+
+
+def bellman_ford_dijkstra(graph: CSRGraph) -> CSRGraph:
+    """
+    Reweights graph by its distances from an implicit super source, alternating Dijkstra over the nonnegative edges
+    with a Bellman-Ford round over the negative edges until the round improves nothing. Every shortest path uses at
+    most k negative edges, so more than k improving rounds prove a negative cycle.
+    """
+    return graph.reweight(_super_source_distances(graph))
+
+
+def _super_source_distances(graph: CSRGraph):
+    offsets, targets, weights, neg = graph.lists()
+    neg_u, neg_v, neg_w = (array.tolist() for array in graph.neg_edge_arrays())
+    weight_type = globals.WEIGHT_TYPE
+    tolerant = weight_type is float
+    search = search_strategy()
+
+    # from the super source every vertex starts at distance 0, which no nonnegative edge improves
+    dist = [weight_type(0)] * graph.n
+    for _ in range(graph.neg_count + 1):
+        pq = []
+        for u, v, w in zip(neg_u, neg_v, neg_w):
+            alt_dist = dist[u] + w
+            if alt_dist < dist[v] and not (tolerant and isclose(alt_dist, dist[v], abs_tol=1e-9)):
+                dist[v] = alt_dist
+                pq.append((alt_dist, v))
+        if not pq:
+            return np.array(dist, dtype=distance_dtype())
+        heapify(pq)
+        search(offsets, targets, weights, neg, dist, pq)
+
+    raise NegativeCycleError(find_negative_cycle(graph))
+
+
+def goldberg_scaling(graph: CSRGraph) -> CSRGraph:
+    """
+    Bit scaling for integer weights in the manner of Goldberg: with b the bit length of the most negative weight,
+    scale i rounds the weights to ceil(w / 2^(b-i)). Doubling a potential for one scale leaves every edge of the
+    next scale at least -1, and that potential is refined with bellman_ford_dijkstra, so each refinement only
+    repairs shallow negative paths. Goldberg refines with a sqrt(n) bound on the admissible graph; the hybrid search
+    takes its place here.
+    """
+    validate_engine("goldberg")
+
+    weights = graph.weights
+    bits = int(-weights.min(initial=0)).bit_length()
+    potential = np.zeros(graph.n, dtype=weights.dtype)
+
+    for i in range(1, bits + 1):
+        shift = bits - i
+        # -((-w) >> s) is w / 2^s rounded up
+        scaled = CSRGraph(graph.offsets, graph.targets, -((-weights) >> shift), _topology=graph._topology)
+        potential = 2 * potential
+        potential += _super_source_distances(scaled.reweight(potential)).astype(weights.dtype)
+
+    return graph.reweight(potential)
+
+
+def hop_bounded_is_cheaper(n: int, k: int) -> bool:
+    """
+    Whether bellman_ford_dijkstra, which needs at most k + 1 Dijkstra searches, is cheaper than a single elimination
+    round, whose betweenness reduction alone searches from c * r * ceil(ln n) sampled vertices with r = ceil(k^(1/9))
+    and c its default sampling constant.
+    """
+    r = ceil(k ** (1/9))
+    return k + 1 <= SAMPLING_CONSTANT * r * ceil(log(max(n, 2)))
+
+
+ENGINES = {
+    "bellman-ford-dijkstra": bellman_ford_dijkstra,
+    "goldberg": goldberg_scaling,
+}
+
+
+def validate_engine(engine: str):
+    """
+    Raises ValueError unless engine is "fineman", "auto" or one of ENGINES usable with the current weight type.
+    """
+    if engine not in ENGINES and engine not in ("fineman", "auto"):
+        raise ValueError("Invalid parameter")
+    if engine == "goldberg" and globals.WEIGHT_TYPE is not int:
+        raise ValueError("Goldberg scaling requires integer weights")
+
+
+def select_engine(n: int, k: int) -> str:
+    """
+    Picks the engine for a graph with n vertices and k negative edges. The hybrid search needs at most k + 1 rounds
+    of O(m log n), against the O(m n^(8/9) log n) of Fineman's bound, so the number of edges m drops out and the
+    hybrid wins unless k exceeds n^(8/9); beyond that, integer weights go to scaling, whose refinements only see
+    edges of weight -1.
+    """
+    if k <= n ** (8/9):
+        return "bellman-ford-dijkstra"
+    return "goldberg" if globals.WEIGHT_TYPE is int else "fineman"
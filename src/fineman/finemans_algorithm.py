@@ -1,32 +1,195 @@
+from contextlib import nullcontext
+from itertools import repeat
 import random as rand
 from math import log2
 
-from src.fineman import preprocess_graph
+import numpy as np
+
+from src.fineman.core_functions import find_negative_cycle
+from src.fineman.csr_graph import distance_dtype, to_csr
 from src.fineman.dijkstra import dijkstra
 from src.fineman.elimination_algorithm import elimination_algorithm
+from src.fineman.engines import ENGINES, bellman_ford_dijkstra, hop_bounded_is_cheaper, select_engine, \
+    validate_engine
+from src.fineman.parallel import ParallelExecutor
+from src.fineman.potential_cache import graph_fingerprint
+from src.fineman.preprocessing import compute_threshold, split_vertices
+from src.fineman.strong_components import reweight_by_components
+from src.utils import NegativeCycleError
 import src.globals as globals
 
-def fineman(graph, source: int, seed = None, weight_type = float):
+def fineman(graph, source: int, seed = None, weight_type = float, workers = None, cache = None,
+            with_parent = False, with_potential = False, engine = "fineman", hop_bounded = False,
+            components = False):
+    """
+    Computes the distances from source in a graph with negative edge weights.
+
+    :param with_parent: also return the parent of every vertex in a shortest path tree (-1 for the source and
+    unreachable vertices)
+    :param with_potential: also return the price function under which every edge of graph has nonnegative weight
+    :param engine: how the negative edges are removed: "fineman" for the elimination rounds, one of the practical
+    engines in ENGINES, or "auto" to pick by the size and number of negative edges of graph
+    :param hop_bounded: let the elimination rounds hand over to bellman_ford_dijkstra once that costs less than
+    another round
+    :param components: remove the negative edges per strongly connected component rather than on the whole graph
+
+    :return: the distances, followed by the parents and the potential when asked for
+    """
     globals.change_weight_type(weight_type)
     if seed is not None: rand.seed(seed)
 
-    org_n = len(graph.keys())
-    m = sum(len(neighbors) for neighbors in graph.values())
+    graph = to_csr(graph)
+    n = graph.n
+
+    # sampled computations only fan out to a process pool when asked for
+    with ParallelExecutor(workers) if workers else nullcontext() as executor:
+        org_graph, origin, reweighted_graph = _eliminated(graph, executor, cache, engine, hop_bounded, components)
+
+    if not (with_parent or with_potential):
+        return dijkstra(reweighted_graph, source, org_graph)[:n]
+
+    distances, parent = dijkstra(reweighted_graph, source, org_graph, with_parent=True)
+    result = [distances[:n]]
+    if with_parent:
+        result.append(_original_parents(np.array(parent, dtype=np.int64), origin, n))
+    if with_potential:
+        potential = reweighted_graph.potential
+        result.append(np.zeros(n, dtype=org_graph.base_weights.dtype) if potential is None else potential[:n].copy())
+    return tuple(result)
+
+
+def _original_parents(parent, origin, n):
+    """
+    Maps a shortest path tree of the preprocessed graph to the first n (original) vertices. The path into an
+    original vertex v ends in vertices split off from v, so the parent of v is the origin of its first ancestor
+    not split off from v.
+    """
+    vertices = np.arange(n)
+    ancestor = parent[:n].copy()
+
+    pending = ancestor >= 0
+    pending[pending] = origin[ancestor[pending]] == vertices[pending]
+    while pending.any():
+        ancestor[pending] = parent[ancestor[pending]]
+        pending[pending] = origin[ancestor[pending]] == vertices[pending]
+
+    return np.where(ancestor >= 0, origin[ancestor], -1)
+
+
+def multi_source_fineman(graph, sources = None, seed = None, weight_type = float, workers = None, cache = None,
+                         engine = "fineman", hop_bounded = False, components = False):
+    """
+    Computes the distances from many sources in the manner of Johnson's algorithm: the elimination rounds run once,
+    and then only the final Dijkstra search runs per source on the graph they made nonnegative.
+
+    :param sources: the source vertices, by default every vertex, which gives all pairs distances
+    :param workers: the number of processes used for the elimination rounds and the searches
+
+    :return: an array whose row i holds the distances from sources[i] to every vertex
+    """
+    globals.change_weight_type(weight_type)
+    if seed is not None: rand.seed(seed)
+
+    graph = to_csr(graph)
+    n = graph.n
+    sources = np.arange(n) if sources is None else np.asarray(sources, dtype=np.int64).reshape(-1)
+
+    with ParallelExecutor(workers) if workers else nullcontext() as executor:
+        org_graph, _, reweighted_graph = _eliminated(graph, executor, cache, engine, hop_bounded, components)
+
+        if executor is None:
+            return _dijkstra_rows(reweighted_graph, org_graph, sources.tolist(), n)
 
-    graph, neg_edges = preprocess_graph(graph, org_n, m)
-    org_graph = graph.copy()
-    n = len(graph.keys())
-    neg_edges = {(u,v) for u, edges in graph.items() for v, w in edges.items() if w < 0}
+        chunks = [chunk.tolist() for chunk in np.array_split(sources, executor.workers) if len(chunk)]
+        if not chunks:
+            return _dijkstra_rows(reweighted_graph, org_graph, [], n)
+        with executor.share(reweighted_graph) as shared_graph, executor.share(org_graph) as shared_org_graph:
+            return np.concatenate(executor.map(_dijkstra_task, repeat(shared_graph), repeat(shared_org_graph),
+                                               chunks, repeat(n)))
+
+
+def _dijkstra_rows(graph, org_graph, sources, n):
+    distances = np.empty((len(sources), n), dtype=distance_dtype())
+    for row, source in enumerate(sources):
+        distances[row] = dijkstra(graph, source, org_graph)[:n]
+    return distances
+
+def _dijkstra_task(shared_graph, shared_org_graph, sources, n):
+    return _dijkstra_rows(shared_graph.attach(), shared_org_graph.attach(), sources, n)
+
+
+def _eliminated(graph, executor, cache, engine, hop_bounded, components):
+    """
+    Returns the preprocessed graph, the origin of its vertices and its final reweighting, from the cache if possible.
+    """
+    # the elimination rounds only depend on the graph, so a cache lets further sources skip them
+    key = None if cache is None else graph_fingerprint(graph)
+    entry = None if cache is None else cache.get(key)
+    if entry is None:
+        entry = _eliminate_negative_edges(graph, executor, engine, hop_bounded, components)
+        if cache is not None: cache.put(key, *entry)
+    return entry
+
+
+def _eliminate_negative_edges(graph, executor, engine = "fineman", hop_bounded = False, components = False):
+    """
+    Preprocesses graph and reweights it until no negative edges remain, using the given engine.
+
+    :return: the preprocessed graph, the origin of its vertices and its final reweighting
+    """
+    validate_engine(engine)
+
+    org_graph, origin = split_vertices(graph, compute_threshold(graph.n, graph.m))
+    if engine == "auto":
+        engine = select_engine(graph.n, graph.neg_count)
+
+    if engine == "fineman":
+        reweight = lambda graph: _elimination_rounds(graph, executor, hop_bounded)
+    else:
+        reweight = ENGINES[engine]
+
+    try:
+        # negative edges are only removed inside the strongly connected components containing them
+        graph = reweight_by_components(org_graph, reweight) if components else reweight(org_graph)
+
+    except NegativeCycleError as error:
+        # the engines report the cycle in the vertices of the preprocessed graph, so it is only searched for when
+        # the error comes without one
+        cycle = error.get_cycle()
+        if cycle is None:
+            cycle = find_negative_cycle(org_graph)
+        if cycle is None:
+            raise
+        raise NegativeCycleError(_original_cycle(np.asarray(cycle), origin)) from error
+
+    return org_graph, origin, graph
+
+
+def _elimination_rounds(graph, executor, hop_bounded = False):
+    n = graph.n
 
     for _ in range(int(log2(n))):
 
-        k = len(neg_edges)
+        k = graph.neg_count
 
         for _ in range(int(k**(2/3))):
-            graph, neg_edges = elimination_algorithm(graph, neg_edges)
+            # once few negative edges are left, searching with them directly is cheaper than another round
+            if hop_bounded and hop_bounded_is_cheaper(n, graph.neg_count):
+                return bellman_ford_dijkstra(graph)
 
-            if len(neg_edges) == 0: return dijkstra(graph, source, org_graph)[:org_n]
+            graph, _ = elimination_algorithm(graph, graph.neg_mask, executor=executor)
 
-    distances = dijkstra(graph, source, org_graph)[:org_n]
+            if not graph.neg_count: return graph
 
-    return distances
+    return graph
+
+
+def _original_cycle(cycle, origin):
+    """
+    Maps a cycle of the preprocessed graph to the original vertices, where the vertices split off from the same
+    vertex follow each other on the cycle and collapse into it.
+    """
+    vertices = origin[cycle[:-1]].tolist()
+    # keep the first vertex of every run, where runs wrap around the end of the cycle
+    firsts = [v for i, v in enumerate(vertices) if v != vertices[i - 1]] or vertices[:1]
+    return firsts + [firsts[0]]
@@ -1,9 +1,11 @@
+from itertools import repeat
 from typing import Tuple,Set
 import random as rand
 from math import ceil, log
 from src.fineman.core_functions import compute_reach
+from src.fineman.csr_graph import to_csr
 
-def heavy_light_partition(graph, neg_edges, negative_subset, rho, c: int, seed=None) -> Tuple[Set[int], Set[int]]:
+def heavy_light_partition(graph, neg_edges, negative_subset, rho, c: int, seed=None, executor=None) -> Tuple[Set[int], Set[int]]:
     if seed is not None: rand.seed(seed)
 
     n = len(graph)
@@ -17,9 +19,17 @@ def heavy_light_partition(graph, neg_edges, negative_subset, rho, c: int, seed=N
     
     sample_rounds = c*ceil(log(n))
 
-    for _ in range(sample_rounds):
-        U_prime = {v for v in negative_subset if rand.random() < sample_prob}
-        R = compute_reach(graph, neg_edges, U_prime, 1)
+    if executor is None:
+        reaches = []
+        for _ in range(sample_rounds):
+            U_prime = {v for v in negative_subset if rand.random() < sample_prob}
+            reaches.append(compute_reach(graph, neg_edges, U_prime, 1))
+    else:
+        with executor.share(to_csr(graph, neg_edges)) as shared:
+            reaches = executor.map(_sample_reach, repeat(shared), repeat(sorted(negative_subset)),
+                                   repeat(sample_prob), executor.task_seeds(sample_rounds))
+
+    for R in reaches:
         for v in R:
             count[v] = count[v] + 1
 
@@ -27,3 +37,9 @@ def heavy_light_partition(graph, neg_edges, negative_subset, rho, c: int, seed=N
     H = {u for u in negative_subset if count[u] >= heavy_threshold}
     L = negative_subset - H
     return (H,L)
+
+def _sample_reach(shared, negative_subset, sample_prob, seed):
+    graph = shared.attach()
+    rng = rand.Random(seed)
+    U_prime = {v for v in negative_subset if rng.random() < sample_prob}
+    return compute_reach(graph, graph.neg_mask, U_prime, 1)
@@ -1,31 +1,45 @@
 from src.fineman.core_functions import *
 from src.fineman.rand_is import *
+from src.fineman.rand_is import _rand_is_task
 from src.fineman.heavy_light_partition import *
+from src.fineman.csr_graph import to_csr
+from itertools import repeat
 import time
 from math import ceil, log2
 import random as rand
 
 
-def find_is_or_crust(graph, neg_edges, t_neg_edges, negative_subset, c=6, c_prime=4, seed = None):
+def find_is_or_crust(graph, neg_edges, t_neg_edges, negative_subset, c=6, c_prime=4, seed = None, executor = None):
     if seed is not None: rand.seed(seed)
     k_hat = len(negative_subset)
     rho = k_hat**(1/3)
 
-    (H,L) = heavy_light_partition(graph, neg_edges, negative_subset, rho, c)
+    (H,L) = heavy_light_partition(graph, neg_edges, negative_subset, rho, c, executor=executor)
     if H:
         y = rand.choice(tuple(H))
         dist = h_hop_stsp(y, graph, t_neg_edges, 1)
         U = {u for u in negative_subset if dist[u] < 0}
         if len(U) < (1/8)*k_hat/rho:
             new_seed = (int(time.time()*1000))
-            return find_is_or_crust(graph, neg_edges, t_neg_edges, negative_subset, seed=new_seed)
+            return find_is_or_crust(graph, neg_edges, t_neg_edges, negative_subset, seed=new_seed, executor=executor)
         else:
             return (y,U)
     else:
         IS_size_threshold = rho/16
-        for _ in range(c_prime*ceil(log2(len(graph)))):
-            I = rand_is(graph, neg_edges, L, rho)
-            if len(I) >= IS_size_threshold:
-                return I
+        retries = c_prime*ceil(log2(len(graph)))
+        if executor is None:
+            for _ in range(retries):
+                I = rand_is(graph, neg_edges, L, rho)
+                if len(I) >= IS_size_threshold:
+                    return I
+        else:
+            # retries run a batch at a time, taking the first success in retry order
+            seeds = executor.task_seeds(retries)
+            with executor.share(to_csr(graph, neg_edges)) as shared:
+                for i in range(0, retries, executor.workers):
+                    batch = seeds[i:i+executor.workers]
+                    for I in executor.map(_rand_is_task, repeat(shared), repeat(sorted(L)), repeat(rho), batch):
+                        if len(I) >= IS_size_threshold:
+                            return I
         new_seed = (int(time.time()*1000))
-        return find_is_or_crust(graph, neg_edges, t_neg_edges, negative_subset, seed=new_seed)
\ No newline at end of file
+        return find_is_or_crust(graph, neg_edges, t_neg_edges, negative_subset, seed=new_seed, executor=executor)
\ No newline at end of file
@@ -0,0 +1,131 @@
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+import random as rand
+
+import numpy as np
+
+from src.fineman.csr_graph import CSRGraph
+import src.globals as globals
+
+_GRAPH_ARRAYS = ("offsets", "targets", "weights", "neg_mask")
+
+# graphs attached by a worker process, keyed by the shared memory name of their offsets
+_attached = OrderedDict()
+_MAX_ATTACHED = 4
+
+
+class SharedGraph:
+    """
+    A picklable handle to a CSR graph whose arrays are published in shared memory.
+
+    Only the block names, shapes and dtypes travel with a task, and each worker maps the arrays once and
+    reuses them for every later task on the same graph. Object arrays (Decimal weights) cannot live in
+    shared memory and are sent along with the handle instead.
+    """
+
+    def __init__(self, graph: CSRGraph):
+        self.weight_type = globals.WEIGHT_TYPE
+        self.arrays = {}
+        self._blocks = []
+
+        for name in _GRAPH_ARRAYS:
+            array = getattr(graph, name)
+            if array.dtype == object:
+                self.arrays[name] = array
+                continue
+
+            block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+            np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)[:] = array
+            self._blocks.append(block)
+            self.arrays[name] = (block.name, array.shape, array.dtype.str)
+
+        self.key = self.arrays["offsets"][0]
+
+    def __getstate__(self):
+        # the blocks stay owned by the publishing process
+        return {**self.__dict__, "_blocks": []}
+
+    def attach(self) -> CSRGraph:
+        """
+        Returns the shared graph in the calling process, mapping its arrays on first use.
+        """
+        globals.change_weight_type(self.weight_type)
+        if self.key in _attached:
+            _attached.move_to_end(self.key)
+            return _attached[self.key][0]
+
+        blocks, arrays = [], []
+        for name in _GRAPH_ARRAYS:
+            spec = self.arrays[name]
+            if isinstance(spec, np.ndarray):
+                arrays.append(spec)
+                continue
+            block_name, shape, dtype = spec
+            block = shared_memory.SharedMemory(name=block_name)
+            blocks.append(block)
+            arrays.append(np.ndarray(shape, dtype=dtype, buffer=block.buf))
+
+        graph = CSRGraph(*arrays)
+        _attached[self.key] = (graph, blocks)
+        while len(_attached) > _MAX_ATTACHED:
+            _detach(*_attached.popitem(last=False)[1])
+        return graph
+
+    def release(self):
+        """
+        Frees the shared memory blocks. Called by the publishing process once no task uses the graph anymore.
+        """
+        for block in self._blocks:
+            block.close()
+            block.unlink()
+        self._blocks = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+
+def _detach(graph, blocks):
+    del graph
+    for block in blocks:
+        try:
+            block.close()
+        except BufferError:
+            # a task result still references the buffer, the mapping goes away with it
+            pass
+
+
+class ParallelExecutor:
+    """
+    Process pool fanning the independent sampled computations of the algorithm out across cores.
+
+    Every randomized task receives its own seed drawn from the caller's random stream, so the results only
+    depend on that stream and not on the number of workers or the order in which tasks finish.
+    """
+
+    def __init__(self, workers: int):
+        if workers < 1:
+            raise ValueError("Invalid parameter")
+        self.workers = workers
+        self._pool = ProcessPoolExecutor(workers)
+
+    def share(self, graph: CSRGraph) -> SharedGraph:
+        return SharedGraph(graph)
+
+    def map(self, fn, *iterables) -> list:
+        return list(self._pool.map(fn, *iterables))
+
+    def task_seeds(self, count: int) -> list[int]:
+        return [rand.getrandbits(64) for _ in range(count)]
+
+    def shutdown(self):
+        self._pool.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.shutdown()
@@ -0,0 +1,118 @@
+from collections import OrderedDict
+from decimal import Decimal
+from hashlib import blake2b
+import os
+from pathlib import Path
+import tempfile
+
+import numpy as np
+
+from src.fineman.csr_graph import CSRGraph
+import src.globals as globals
+
+
+def graph_fingerprint(graph: CSRGraph) -> str:
+    """
+    Returns a hash of the weight type, structure and weights of graph, which identifies it across processes.
+    """
+    digest = blake2b(digest_size=20)
+    digest.update(f"{globals.WEIGHT_TYPE.__name__}:{graph.n}:{graph.m}".encode())
+    digest.update(np.ascontiguousarray(graph.offsets, dtype="<i8").tobytes())
+    digest.update(np.ascontiguousarray(graph.targets, dtype="<i8").tobytes())
+    weights = graph.weights
+    if weights.dtype == object:
+        digest.update("\x00".join(map(str, weights.tolist())).encode())
+    else:
+        digest.update(np.ascontiguousarray(weights).tobytes())
+    return digest.hexdigest()
+
+
+class PotentialCache:
+    """
+    Stores the outcome of the elimination rounds of fineman per input graph: the preprocessed graph, the origin of
+    its vertices and the potential making all of its weights nonnegative. Later calls on the same graph, e.g. from
+    other sources, only run the final Dijkstra search.
+
+    Entries are keyed by graph_fingerprint and kept in memory up to max_entries, evicting the least recently used
+    one. With a directory, entries are also written there and read back on a miss, so they survive the process.
+    """
+
+    def __init__(self, max_entries: int = 8, directory=None):
+        if max_entries < 1:
+            raise ValueError("Invalid parameter")
+        self.max_entries = max_entries
+        self.directory = None if directory is None else Path(directory)
+        self._entries = OrderedDict()
+
+        if self.directory is not None:
+            self.directory.mkdir(parents=True, exist_ok=True)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries or (self.directory is not None and self._path(key).exists())
+
+    def get(self, key: str):
+        """
+        Returns the entry (preprocessed graph, origin, reweighted graph) stored under key, or None.
+        """
+        if key in self._entries:
+            self._entries.move_to_end(key)
+            return self._entries[key]
+
+        if self.directory is None or not self._path(key).exists():
+            return None
+        entry = self._read(key)
+        self._remember(key, entry)
+        return entry
+
+    def put(self, key: str, org_graph: CSRGraph, origin: np.ndarray, graph: CSRGraph):
+        """
+        Stores the preprocessed graph org_graph, the origin of its vertices and graph, the reweighting of
+        org_graph without negative edges.
+        """
+        entry = (org_graph, origin, graph)
+        self._remember(key, entry)
+        if self.directory is not None:
+            self._write(key, entry)
+
+    def clear(self):
+        """
+        Empties the memory tier. Entries on disk are kept.
+        """
+        self._entries.clear()
+
+    def _remember(self, key, entry):
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{key}.npz"
+
+    def _write(self, key, entry):
+        org_graph, origin, graph = entry
+        potential = np.zeros(0, dtype=org_graph.base_weights.dtype) if graph.potential is None else graph.potential
+        arrays = {"offsets": org_graph.offsets, "targets": org_graph.targets, "weights": org_graph.base_weights,
+                  "origin": origin, "potential": potential}
+        # Decimals are stored as strings so the file can be read without unpickling
+        arrays = {name: array.astype(str) if array.dtype == object else array for name, array in arrays.items()}
+
+        # written under a temporary name and renamed, so concurrent readers never see a partial file
+        file, temporary = tempfile.mkstemp(dir=self.directory, suffix=".npz")
+        with os.fdopen(file, "wb") as file:
+            np.savez(file, **arrays)
+        os.replace(temporary, self._path(key))
+
+    def _read(self, key):
+        with np.load(self._path(key), allow_pickle=False) as arrays:
+            arrays = {name: arrays[name] for name in arrays.files}
+        for name in ("weights", "potential"):
+            if globals.WEIGHT_TYPE is Decimal:
+                arrays[name] = np.array([Decimal(w) for w in arrays[name].tolist()], dtype=object)
+
+        org_graph = CSRGraph(arrays["offsets"], arrays["targets"], arrays["weights"])
+        graph = org_graph.reweight(arrays["potential"]) if len(arrays["potential"]) else org_graph
+        return org_graph, arrays["origin"], graph
@@ -1,75 +1,135 @@
 from math import ceil
-from collections import deque
-from src.fineman.core_functions import get_set_of_neg_vertices, transpose_graph
+
+import numpy as np
+
+from src.fineman.csr_graph import CSRGraph, concatenated_ranges
 from src.utils.threshold_error import InvalidThresholdError
 import src.globals as globals
 
 SCALAR_FOR_THRESHOLD = 4
 
-def ensure_simp1(graph: dict[int, dict[int, float]]):
-    
-    n = len(graph.keys())
-    neg_vertices = get_set_of_neg_vertices(graph)
+# Preprocessing works on parallel edge arrays (sources, targets, weights) together with origin, which maps every
+# vertex to the vertex of the input graph it was split off from. New vertices are numbered after the existing ones,
+# so the input vertices keep their numbers. Both degree bounds are enforced on the same arrays, grouping the edges
+# by source for out-degrees and by target for in-degrees, so the graph is never transposed.
+
+
+def _grouped(keys, n: int):
+    """
+    Returns the edge indices ordered by key together with the start and length of every key's group.
+    """
+    degrees = np.bincount(keys, minlength=n)
+    starts = np.cumsum(degrees) - degrees
+    return np.argsort(keys, kind="stable"), starts, degrees
+
+
+def _zero_weights(count: int, weights) -> np.ndarray:
+    return np.full(count, globals.WEIGHT_TYPE(0), dtype=weights.dtype)
+
+
+def _split_negative_vertices(sources, targets, weights, origin):
+    """
+    Moves the edges of every vertex with a negative outgoing edge and out-degree above one to a new vertex,
+    reached over a single edge carrying the most negative weight.
+    """
+    n = len(origin)
+    order, starts, degrees = _grouped(sources, n)
+    negative = np.zeros(n, dtype=bool)
+    negative[sources[weights < 0]] = True
+    split = np.flatnonzero(negative & (degrees > 1))
+    if not len(split):
+        return sources, targets, weights, origin
+
+    new_vertices = n + np.arange(len(split))
+    edges = order[concatenated_ranges(starts[split], degrees[split])]
+    row = np.repeat(np.arange(len(split)), degrees[split])
+    most_negative = np.minimum.reduceat(weights[edges], np.cumsum(degrees[split]) - degrees[split])
 
-    for vertex in neg_vertices:
-        if len(graph[vertex]) > 1:
-            
-            old_neighbors = graph[vertex]
+    sources, weights = sources.copy(), weights.copy()
+    sources[edges] = new_vertices[row]
+    weights[edges] = weights[edges] - most_negative[row]
 
-            # introduce new vertex
-            new_vertex = n
-            n = n + 1
-            most_neg_weight = min(weights for weights in graph[vertex].values())
-            graph[vertex] = {new_vertex: most_neg_weight}
+    return (np.concatenate((sources, split)), np.concatenate((targets, new_vertices)),
+            np.concatenate((weights, most_negative)), np.concatenate((origin, origin[split])))
 
-            # change weights on existing edges
-            graph[new_vertex] = {}
-            for neighbor, weight in old_neighbors.items():
-                graph[new_vertex][neighbor] = weight - most_neg_weight
 
-    return graph
+def _split_high_degree(keys, origin, threshold: int):
+    """
+    Replaces every vertex with more than threshold edges grouped under it in keys by a binary tree of new vertices,
+    halving the edges at every level until each leaf holds at most threshold of them.
 
+    :return: the keys with the edges moved to the leaves, the tree edges as arrays of parents and children, and the
+    extended origin
+    """
+    n = len(origin)
+    order, starts, degrees = _grouped(keys, n)
+    vertices = np.flatnonzero(degrees > threshold)
+    starts, degrees, roots = starts[vertices], degrees[vertices], origin[vertices]
 
-def ensure_simp2(graph: dict[int, dict[int, float]], threshold: int):
+    keys = keys.copy()
+    parents, children, origins = [], [], [origin]
+    while len(vertices):
+        # both halves of vertex i become the vertices n + 2i and n + 2i + 1
+        halves = (degrees + 1) // 2
+        new_vertices = n + np.arange(2 * len(vertices))
+        n += len(new_vertices)
+        parents.append(np.repeat(vertices, 2))
+        children.append(new_vertices)
 
-    n = len(graph.keys())
+        vertices = new_vertices
+        starts = np.column_stack((starts, starts + halves)).ravel()
+        degrees = np.column_stack((halves, degrees - halves)).ravel()
+        roots = np.repeat(roots, 2)
+        origins.append(roots)
 
-    split_queue = deque()
+        leaves = degrees <= threshold
+        keys[order[concatenated_ranges(starts[leaves], degrees[leaves])]] = np.repeat(vertices[leaves],
+                                                                                     degrees[leaves])
+        vertices, starts, degrees, roots = vertices[~leaves], starts[~leaves], degrees[~leaves], roots[~leaves]
 
-    for vertex in graph.keys():
-        if len(graph[vertex]) > threshold:
-            split_queue.append(vertex)
+    empty = np.zeros(0, dtype=np.int64)
+    return keys, np.concatenate([empty, *parents]), np.concatenate([empty, *children]), np.concatenate(origins)
 
-    while split_queue:
-        vertex = split_queue.popleft()
 
-        new_vertex1, new_vertex2 = n, n+1
-        n = n + 2
-        graph[new_vertex1] = {}
-        graph[new_vertex2] = {}
+def _ensure_out_degree(sources, targets, weights, origin, threshold: int):
+    sources, parents, children, origin = _split_high_degree(sources, origin, threshold)
+    return (np.concatenate((sources, parents)), np.concatenate((targets, children)),
+            np.concatenate((weights, _zero_weights(len(parents), weights))), origin)
 
-        mid = ceil(len(graph[vertex])/2)
 
-        # halve edges
-        count = 0
-        for v, w in graph[vertex].items():
-            if count < mid:
-                graph[new_vertex1][v] = w
-            else:
-                graph[new_vertex2][v] = w
-            count += 1
+def _ensure_in_degree(sources, targets, weights, origin, threshold: int):
+    # the tree edges point from the leaves towards the split vertex
+    targets, parents, children, origin = _split_high_degree(targets, origin, threshold)
+    return (np.concatenate((sources, children)), np.concatenate((targets, parents)),
+            np.concatenate((weights, _zero_weights(len(parents), weights))), origin)
 
 
-        graph[vertex] = {new_vertex1:globals.WEIGHT_TYPE(0), new_vertex2:globals.WEIGHT_TYPE(0)}
+def _edge_arrays(graph: CSRGraph):
+    return graph.sources, graph.targets, graph.weights, np.arange(graph.n)
 
-        # check whether new vertices violate the degree threshold
-        if len(graph[new_vertex1]) > threshold:
-            split_queue.append(new_vertex1)
 
-            if len(graph[new_vertex2]) > threshold:
-                split_queue.append(new_vertex2)
+def _to_graph(sources, targets, weights, origin) -> CSRGraph:
+    return CSRGraph.from_edges(len(origin), sources, targets, weights)
 
-    return graph
+
+def _transformed(graph, transformation):
+    if isinstance(graph, dict):
+        return _to_graph(*transformation(_edge_arrays(CSRGraph.from_dict(graph)))).to_dict()
+    return _to_graph(*transformation(_edge_arrays(graph)))
+
+
+def ensure_simp1(graph):
+    """
+    Ensures every vertex with a negative outgoing edge has out-degree one.
+    """
+    return _transformed(graph, lambda edges: _split_negative_vertices(*edges))
+
+
+def ensure_simp2(graph, threshold: int):
+    """
+    Ensures every vertex has out-degree at most threshold.
+    """
+    return _transformed(graph, lambda edges: _ensure_out_degree(*edges, threshold))
 
 
 def compute_threshold(n: int, m: int):
@@ -77,22 +137,31 @@ def compute_threshold(n: int, m: int):
 
     if threshold <= 2:
         raise InvalidThresholdError
-    
+
     return threshold
 
 
-def preprocess_graph(graph: dict[int, dict[int, float]], n, m):
+def split_vertices(graph: CSRGraph, threshold: int):
+    """
+    Transforms graph such that every vertex with a negative outgoing edge has out-degree one and every vertex has
+    in- and out-degree at most threshold, in a single pass over the edge arrays.
 
-    threshold = compute_threshold(n, m)
+    :return: the transformed graph, in which the vertices of graph keep their numbers, and the array mapping every
+    vertex of it to the vertex of graph it originates from
+    """
+    edges = _split_negative_vertices(*_edge_arrays(graph))
+    edges = _ensure_out_degree(*edges, threshold)
+    edges = _ensure_in_degree(*edges, threshold)
+    return _to_graph(*edges), edges[3]
 
-    transformed_graph = ensure_simp1(graph)
 
-    # ensure for out-degree
-    transformed_graph = ensure_simp2(transformed_graph, threshold)
+def preprocess_graph(graph, n, m):
+
+    threshold = compute_threshold(n, m)
 
-    # ensure for in-degree
-    transposed_graph, _ = transpose_graph(transformed_graph)
-    final_transposed_graph = ensure_simp2(transposed_graph, threshold)
-    
-    return transpose_graph(final_transposed_graph)
+    if isinstance(graph, dict):
+        transformed_graph, _ = split_vertices(CSRGraph.from_dict(graph), threshold)
+        return transformed_graph.to_dict(), transformed_graph.edge_set()
 
+    transformed_graph, _ = split_vertices(graph, threshold)
+    return transformed_graph, transformed_graph.neg_mask
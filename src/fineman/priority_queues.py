@@ -0,0 +1,110 @@
+from heapq import heapify, heappop, heappush
+from math import isclose
+
+import src.globals as globals
+
+# Dijkstra searches over CSR adjacency lists, one per priority queue strategy and weight type. They share the
+# signature
+#
+#   search(offsets, targets, weights, skip, dist, pq, on_relax=None)
+#
+# and scan from the (distance, vertex) entries in pq, ignoring the edges i with skip[i] set, improving dist in
+# place and calling on_relax(u, v, i) whenever edge i = (u, v) improves dist[v]. The kernels are specialized per
+# weight type up front, so the relaxation loops never test the weight type.
+
+
+def heap_search(offsets, targets, weights, skip, dist, pq, on_relax=None):
+    """
+    Binary heap with lazy deletion and exact comparisons, which works for every weight type.
+    """
+    while pq:
+        current_dist, u = heappop(pq)
+        if current_dist > dist[u]:
+            continue
+
+        for i in range(offsets[u], offsets[u+1]):
+            if skip[i]:
+                continue
+            v = targets[i]
+            alt_dist = current_dist + weights[i]
+            if alt_dist < dist[v]:
+                dist[v] = alt_dist
+                heappush(pq, (alt_dist, v))
+                if on_relax is not None:
+                    on_relax(u, v, i)
+
+
+def tolerant_heap_search(offsets, targets, weights, skip, dist, pq, on_relax=None):
+    """
+    Binary heap for float weights, ignoring improvements within 1e-9 to absorb rounding errors.
+    """
+    while pq:
+        current_dist, u = heappop(pq)
+        if current_dist > dist[u]:
+            continue
+
+        for i in range(offsets[u], offsets[u+1]):
+            if skip[i]:
+                continue
+            v = targets[i]
+            alt_dist = current_dist + weights[i]
+            if alt_dist < dist[v] and not isclose(alt_dist, dist[v], abs_tol=1e-9):
+                dist[v] = alt_dist
+                heappush(pq, (alt_dist, v))
+                if on_relax is not None:
+                    on_relax(u, v, i)
+
+
+def bucket_search(offsets, targets, weights, skip, dist, pq, on_relax=None):
+    """
+    Bucket queue in the style of Dial's algorithm for exact (integer) distances. Vertices at the same distance
+    share a bucket, so only the distinct distances pass through the heap, and the bucket being scanned absorbs the
+    vertices reached over zero weight edges. Unlike Dial's circular array of max weight + 1 buckets, only nonempty
+    buckets are stored, as reweighted graphs can have arbitrarily large weights.
+    """
+    buckets = {}
+    for current_dist, v in pq:
+        buckets.setdefault(current_dist, []).append(v)
+    pq.clear()
+    keys = list(buckets)
+    heapify(keys)
+
+    while keys:
+        current_dist = heappop(keys)
+        bucket = buckets[current_dist]
+
+        for u in bucket:
+            if current_dist > dist[u]:
+                continue
+
+            for i in range(offsets[u], offsets[u+1]):
+                if skip[i]:
+                    continue
+                v = targets[i]
+                alt_dist = current_dist + weights[i]
+                if alt_dist < dist[v]:
+                    dist[v] = alt_dist
+                    next_bucket = buckets.get(alt_dist)
+                    if next_bucket is None:
+                        buckets[alt_dist] = [v]
+                        heappush(keys, alt_dist)
+                    else:
+                        next_bucket.append(v)
+                    if on_relax is not None:
+                        on_relax(u, v, i)
+
+        del buckets[current_dist]
+
+
+# the search used for each weight type, any other weight type (Decimal) uses heap_search
+SEARCH_STRATEGIES = {int: bucket_search, float: tolerant_heap_search}
+
+
+def search_strategy(tolerant=True):
+    """
+    Returns the Dijkstra search for the current weight type. Without tolerant, float weights are compared exactly.
+    """
+    search = SEARCH_STRATEGIES.get(globals.WEIGHT_TYPE, heap_search)
+    if search is tolerant_heap_search and not tolerant:
+        return heap_search
+    return search
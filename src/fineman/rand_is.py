@@ -1,13 +1,17 @@
 from typing import Set
 import random as rand
 from math import ceil
-from src.fineman.core_functions import subset_bfd
+from src.fineman.core_functions import subset_bfd, _negative_entries
 
-def rand_is(graph,negative_edges, negative_subset, rho) -> Set[int]:
+def rand_is(graph,negative_edges, negative_subset, rho, rng=rand) -> Set[int]:
 
     sample_size = ceil(rho/4)
-    I_prime = set(rand.sample(tuple(negative_subset), sample_size))
+    I_prime = set(rng.sample(tuple(negative_subset), sample_size))
     distances = subset_bfd(graph, negative_edges, I_prime,1, I_prime=I_prime, save_source=True)
-    R = {v for v in graph.keys() if distances[v] < 0}
+    R = _negative_entries(distances)
     I = I_prime - R 
     return I
+
+def _rand_is_task(shared, negative_subset, rho, seed) -> Set[int]:
+    graph = shared.attach()
+    return rand_is(graph, graph.neg_mask, negative_subset, rho, rand.Random(seed))
@@ -0,0 +1,128 @@
+import numpy as np
+
+from src.fineman.csr_graph import CSRGraph
+from src.utils import NegativeCycleError
+import src.globals as globals
+
+# Negative cycles, and with them the work of removing negative edges, are confined to strongly connected components.
+# reweight_by_components hands every component with negative edges to an engine as a graph of its own and combines
+# the potentials along the condensation, a DAG whose edges any potential decreasing in topological order fixes.
+
+
+def strongly_connected_components(graph: CSRGraph):
+    """
+    Finds the strongly connected components with an iterative version of Tarjan's algorithm.
+
+    :return: the component of every vertex and the number of components, where the components are numbered in
+    topological order, i.e. every edge between two components leads to the higher one
+    """
+    offsets, targets, _, _ = graph.lists()
+    n = graph.n
+    index = [-1] * n
+    low = [0] * n
+    on_stack = [False] * n
+    stack = []
+    component = [0] * n
+    count = 0
+    counter = 0
+
+    for root in range(n):
+        if index[root] != -1:
+            continue
+        index[root] = low[root] = counter
+        counter += 1
+        stack.append(root)
+        on_stack[root] = True
+        work = [(root, offsets[root])]
+
+        while work:
+            v, i = work[-1]
+            end = offsets[v+1]
+            while i < end:
+                w = targets[i]
+                i += 1
+                if index[w] == -1:
+                    # descend into w, continuing with the next edge of v afterwards
+                    work[-1] = (v, i)
+                    index[w] = low[w] = counter
+                    counter += 1
+                    stack.append(w)
+                    on_stack[w] = True
+                    work.append((w, offsets[w]))
+                    break
+                if on_stack[w] and index[w] < low[v]:
+                    low[v] = index[w]
+            else:
+                work.pop()
+                if low[v] == index[v]:
+                    while True:
+                        w = stack.pop()
+                        on_stack[w] = False
+                        component[w] = count
+                        if w == v:
+                            break
+                    count += 1
+                if work and low[v] < low[work[-1][0]]:
+                    low[work[-1][0]] = low[v]
+
+    # Tarjan's algorithm completes the components in reverse topological order
+    return count - 1 - np.array(component, dtype=np.int64), count
+
+
+def reweight_by_components(graph: CSRGraph, reweight) -> CSRGraph:
+    """
+    Reweights graph such that no negative edges remain, where reweight is only applied to the subgraphs induced by
+    the strongly connected components containing negative edges. The potential of each component is then shifted by
+    its distance in the condensation, which makes the edges between components nonnegative.
+
+    :param reweight: an engine, which takes a graph and returns a reweighting of it without negative edges
+    :raises NegativeCycleError: with the cycle the engine reported, in the vertices of graph
+    """
+    labels, count = strongly_connected_components(graph)
+    if count == 1:
+        return reweight(graph)
+
+    u, v, weights = graph.sources, graph.targets, graph.weights
+    internal = labels[u] == labels[v]
+    potential = np.full(graph.n, globals.WEIGHT_TYPE(0), dtype=graph.base_weights.dtype)
+
+    # vertices grouped by component, with local indices inside their component
+    order = np.argsort(labels, kind="stable")
+    bounds = np.searchsorted(labels[order], np.arange(count + 1))
+    local = np.empty(graph.n, dtype=np.int64)
+    local[order] = np.arange(graph.n) - bounds[labels[order]]
+
+    negative = internal & (weights < 0)
+    edges_by_component = np.argsort(labels[u[internal]], kind="stable")
+    internal_edges = np.flatnonzero(internal)[edges_by_component]
+    edge_bounds = np.searchsorted(labels[u[internal_edges]], np.arange(count + 1))
+
+    for c in np.unique(labels[u[negative]]).tolist():
+        vertices = order[bounds[c]:bounds[c+1]]
+        if len(vertices) == 1:
+            # a negative edge inside a single vertex component is a negative self-loop
+            raise NegativeCycleError([int(vertices[0])] * 2)
+        edges = internal_edges[edge_bounds[c]:edge_bounds[c+1]]
+        subgraph = CSRGraph.from_edges(len(vertices), local[u[edges]], local[v[edges]], weights[edges])
+        try:
+            reweighted = reweight(subgraph)
+        except NegativeCycleError as error:
+            # the cycle is reported in the local indices of the component
+            cycle = error.get_cycle()
+            raise NegativeCycleError(None if cycle is None else vertices[cycle].tolist()) from error
+        if reweighted.potential is not None:
+            potential[vertices] = reweighted.potential
+
+    crossing = np.flatnonzero(~internal)
+    crossing_weights = weights[crossing] + potential[u[crossing]] - potential[v[crossing]]
+    if (crossing_weights < 0).any():
+        # distances in the condensation from a virtual source, relaxing the edges in topological order
+        by_target = np.argsort(labels[v[crossing]], kind="stable")
+        shift = [globals.WEIGHT_TYPE(0)] * count
+        for c_u, c_v, w in zip(labels[u[crossing]][by_target].tolist(), labels[v[crossing]][by_target].tolist(),
+                               crossing_weights[by_target].tolist()):
+            if shift[c_u] + w < shift[c_v]:
+                shift[c_v] = shift[c_u] + w
+        potential = potential + np.array(shift, dtype=potential.dtype)[labels]
+
+    return graph.reweight(potential)
@@ -1,7 +1,10 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
 from decimal import Decimal
-# This variable determines the type of the weights of the algorithm
+# The type of the weights of the algorithm. It is kept per execution context, so threads and asyncio tasks can
+# solve with different weight types at the same time; it is read as WEIGHT_TYPE and new threads start with float.
 
-WEIGHT_TYPE = float
+_weight_type = ContextVar("weight_type", default=float)
 
 types = {
         "decimal": Decimal,
@@ -9,9 +12,24 @@ types = {
         "int": int
     }
 
+def __getattr__(name):
+    if name == "WEIGHT_TYPE":
+        return _weight_type.get()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+def _as_type(weight_type):
+    return types[weight_type] if type(weight_type) == str else weight_type
+
 def change_weight_type(weight_type):
-    global WEIGHT_TYPE
-    if type(weight_type) == str:
-        WEIGHT_TYPE = types[weight_type]
-    else:
-        WEIGHT_TYPE = weight_type
+    _weight_type.set(_as_type(weight_type))
+
+@contextmanager
+def using_weight_type(weight_type):
+    """
+    Sets the weight type for the body of the with statement and restores the previous one afterwards.
+    """
+    token = _weight_type.set(_as_type(weight_type))
+    try:
+        yield _weight_type.get()
+    finally:
+        _weight_type.reset(token)
@@ -1,46 +1,183 @@
-from decimal import Decimal
+from collections import deque
 
-from numpy import inf
+import numpy as np
 import src.globals as globals
 from math import isclose
 
+from src.fineman.core_functions import find_negative_cycle
+from src.fineman.csr_graph import CSRGraph, distance_dtype, improvement_check, infinity
 from src.utils.cycle_error import NegativeCycleError
 
 
+def _cycle_through(parent, v):
+    """
+    Follows the parents from v, which leads into a cycle, and returns that cycle in edge direction with its first
+    vertex repeated at the end.
+    """
+    cycle = []
+    visited = set()
+    cur = v
+    while cur not in visited:
+        if cur is None:
+            raise RuntimeError("Impossible state: Trying to fetch negative cycle that should exist")
+        visited.add(cur)
+        cycle.append(cur)
+        cur = parent[cur]
+    cycle_start = cycle.index(cur)
+    cycle = cycle[cycle_start:] + [cur]
+    cycle.reverse()
+    return cycle
+
+
+def _check_for_negative_cycle(graph, dist, parent, with_parent):
+    tolerant = globals.WEIGHT_TYPE is float
+    for u,neighborhood in graph.items():
+        for v in neighborhood.keys():
+            if dist[u] + graph[u][v] < dist[v]:
+                if tolerant and isclose(dist[u] + graph[u][v], dist[v], abs_tol=1e-9):
+                    continue
+                if with_parent:
+                    parent[v] = u
+                    raise NegativeCycleError(_cycle_through(parent, v))
+                raise NegativeCycleError()
+
+
 def standard_bellman_ford(graph, source: int, with_parent = False):
-    if globals.WEIGHT_TYPE is Decimal:
-        infi = Decimal("Infinity")
-    else:
-        infi = inf
+    infi = infinity()
     dist = [infi] * len(graph)
     dist[source] = globals.WEIGHT_TYPE(0)
-    if with_parent: parent = [None] * len(graph)
+    parent = [None] * len(graph) if with_parent else None
     for _ in range(len(graph)-1):
         for u,neighborhood in graph.items():
             for v in neighborhood.keys():
                 if dist[u] + graph[u][v] < dist[v]:
                     dist[v] = dist[u]+graph[u][v]
                     if with_parent: parent[v] = u
-                    
-    for u,neighborhood in graph.items():
-        for v in neighborhood.keys():
-            if dist[u] + graph[u][v] < dist[v]:
-                if globals.WEIGHT_TYPE is float and isclose(dist[u] + graph[u][v], dist[v], abs_tol=1e-9):
-                    continue
-                if with_parent:
-                    parent[v] = u
-                    cycle = []
-                    visited = set()
-                    cur = v
-                    while cur not in visited:
-                        if cur is None:
-                            raise RuntimeError("Impossible state: Trying to fetch negative cycle that should exist")
-                        visited.add(cur)
-                        cycle.append(cur)
-                        cur = parent[cur]
-                    cycle_start = cycle.index(cur)
-                    cycle = cycle[cycle_start:] + [cur]
-                    cycle.reverse()
-                    raise NegativeCycleError(cycle)
-                raise NegativeCycleError()
+
+    _check_for_negative_cycle(graph, dist, parent, with_parent)
     return dist
+
+
+def early_exit_bellman_ford(graph, source: int, with_parent = False):
+    """
+    Bellman-Ford which stops as soon as a pass over all edges changes no distance.
+    """
+    infi = infinity()
+    dist = [infi] * len(graph)
+    dist[source] = globals.WEIGHT_TYPE(0)
+    parent = [None] * len(graph) if with_parent else None
+    for _ in range(len(graph)-1):
+        changed = False
+        for u,neighborhood in graph.items():
+            if dist[u] == infi:
+                continue
+            for v, weight in neighborhood.items():
+                if dist[u] + weight < dist[v]:
+                    dist[v] = dist[u] + weight
+                    if with_parent: parent[v] = u
+                    changed = True
+        if not changed:
+            return dist
+
+    _check_for_negative_cycle(graph, dist, parent, with_parent)
+    return dist
+
+
+def spfa(graph, source: int, with_parent = False):
+    """
+    Queue based Bellman-Ford (SPFA) with Tarjan's subtree disassembly. The shortest path tree is kept as a preorder
+    thread with depths. When the distance of v improves, the subtree of v is removed from the tree, as its distances
+    are outdated, and its vertices are not scanned until they improve again. If the vertex u whose edge improved v
+    lies in that subtree, the tree path from v to u and the edge (u, v) form a negative cycle, which is reported with
+    with_parent.
+    """
+    n = len(graph)
+    dist = [infinity()] * n
+    dist[source] = globals.WEIGHT_TYPE(0)
+    tolerant = globals.WEIGHT_TYPE is float
+
+    parent = [-1] * n
+    depth = [0] * n
+    in_tree = [False] * n
+    in_tree[source] = True
+    # circular preorder thread of the tree vertices, starting at the source
+    following = [-1] * n
+    preceding = [-1] * n
+    following[source] = preceding[source] = source
+
+    queue = deque([source])
+    queued = [False] * n
+    queued[source] = True
+
+    while queue:
+        u = queue.popleft()
+        queued[u] = False
+        if not in_tree[u]:
+            continue
+
+        for v, weight in graph[u].items():
+            alt_dist = dist[u] + weight
+            if not alt_dist < dist[v] or (tolerant and isclose(alt_dist, dist[v], abs_tol=1e-9)):
+                continue
+            dist[v] = alt_dist
+
+            if in_tree[v]:
+                if u == v:
+                    raise NegativeCycleError([v, v] if with_parent else None)
+                # the subtree of v follows v in the thread with greater depths
+                x = following[v]
+                while depth[x] > depth[v]:
+                    if x == u:
+                        parent[v] = u
+                        cycle = [u]
+                        while cycle[-1] != v:
+                            cycle.append(parent[cycle[-1]])
+                        cycle.reverse()
+                        raise NegativeCycleError(cycle + [cycle[0]] if with_parent else None)
+                    in_tree[x] = False
+                    x = following[x]
+                following[preceding[v]] = x
+                preceding[x] = preceding[v]
+
+            parent[v] = u
+            depth[v] = depth[u] + 1
+            in_tree[v] = True
+            following[v] = following[u]
+            preceding[following[u]] = v
+            following[u] = v
+            preceding[v] = u
+
+            if not queued[v]:
+                queue.append(v)
+                queued[v] = True
+
+    return dist
+
+
+def vectorized_bellman_ford(graph, source: int, with_parent = False):
+    """
+    Bellman-Ford with every pass relaxing all edges at once on the CSR arrays, stopping once a pass improves
+    nothing.
+    """
+    csr = graph if isinstance(graph, CSRGraph) else CSRGraph.from_dict(graph)
+    u, v, w = csr.sources, csr.targets, csr.weights
+    dist = np.full(csr.n, infinity(), dtype=distance_dtype())
+    dist[source] = globals.WEIGHT_TYPE(0)
+
+    for _ in range(csr.n):
+        alt_dist = dist[u] + w
+        improving = improvement_check()(alt_dist, dist[v])
+        if not improving.any():
+            return dist.tolist()
+        np.minimum.at(dist, v[improving], alt_dist[improving])
+
+    raise NegativeCycleError(find_negative_cycle(csr, [source]) if with_parent else None)
+
+
+# the baselines selectable in time_algorithms, all called as baseline(graph, source, with_parent)
+BASELINES = {
+    "standard": standard_bellman_ford,
+    "early-exit": early_exit_bellman_ford,
+    "spfa": spfa,
+    "vectorized": vectorized_bellman_ford,
+}
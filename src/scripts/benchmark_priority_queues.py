@@ -0,0 +1,80 @@
+import argparse
+import random as rand
+import time
+
+import networkx as nx
+from numpy import inf
+
+from src.fineman.csr_graph import CSRGraph
+from src.fineman.priority_queues import heap_search, bucket_search
+from src.scripts.synthetic_graph_generator import _generate_single_grid_graph, _get_weight
+import src.globals as globals
+
+SEARCHES = {"heap": heap_search, "bucket": bucket_search}
+
+
+def _family_graph(family: str, n: int):
+    match family:
+        case "path":
+            return nx.path_graph(n, create_using=nx.DiGraph())
+        case "cycle":
+            return nx.cycle_graph(n, create_using=nx.DiGraph())
+        case "random-tree":
+            return nx.DiGraph(nx.random_labeled_tree(n).edges)
+        case "complete":
+            return nx.complete_graph(int(n**0.5), create_using=nx.DiGraph())
+        case "grid":
+            return _generate_single_grid_graph(int(n**0.5))
+        case "random":
+            return nx.gnm_random_graph(n, 6 * n, directed=True)
+        case "watts-strogatz":
+            return nx.DiGraph(nx.connected_watts_strogatz_graph(n, 6, 0.1, 1000))
+
+
+def _non_negative_csr(graph):
+    # Dijkstra only ever runs over non-negative edges, so the weights are drawn with a ratio of 0 negative edges
+    return CSRGraph.from_dict({u: {v: _get_weight((1.0, 0.0)) for v in graph.neighbors(u)} for u in graph.nodes})
+
+
+def _time_search(search, csr, sources, repeats):
+    offsets, targets, weights, neg = csr.lists()
+    best = inf
+    for _ in range(repeats):
+        dist = [inf] * csr.n
+        for s in sources:
+            dist[s] = 0
+        start = time.perf_counter()
+        search(offsets, targets, weights, neg, dist, [(0, s) for s in sources])
+        best = min(best, time.perf_counter() - start)
+    return best, dist
+
+
+def benchmark(n: int, repeats: int):
+    globals.change_weight_type(int)
+    print(f"{'family':<16}{'vertices':>10}{'edges':>10}{'sources':>9}" +
+          "".join(f"{name + ' (s)':>12}" for name in SEARCHES) + f"{'speedup':>9}")
+
+    for family in ["path", "cycle", "random-tree", "complete", "grid", "random", "watts-strogatz"]:
+        csr = _non_negative_csr(_family_graph(family, n))
+        for sources in ([0], range(csr.n)):
+            times = {}
+            results = []
+            for name, search in SEARCHES.items():
+                times[name], dist = _time_search(search, csr, sources, repeats)
+                results.append(dist)
+            assert all(dist == results[0] for dist in results)
+
+            label = "single" if len(sources) == 1 else "all"
+            print(f"{family:<16}{csr.n:>10}{csr.m:>10}{label:>9}" +
+                  "".join(f"{t:>12.4f}" for t in times.values()) + f"{times['heap'] / times['bucket']:>9.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare the Dijkstra priority queues on integer weighted graphs")
+    parser.add_argument("--vertices", type=int, default=20_000, help="Approximate number of vertices per graph")
+    parser.add_argument("--repeats", type=int, default=5, help="Repetitions per measurement, the best is reported")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rand.seed(args.seed)
+    benchmark(args.vertices, args.repeats)
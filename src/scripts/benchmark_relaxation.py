@@ -0,0 +1,84 @@
+import argparse
+import gc
+from heapq import heappop, heappush
+from math import isclose
+import random as rand
+import time
+
+import networkx as nx
+from numpy import inf
+
+from src.fineman.csr_graph import CSRGraph, infinity
+from src.fineman.priority_queues import search_strategy
+from src.scripts.synthetic_graph_generator import _get_weight
+import src.globals as globals
+
+
+def _dispatching_search(offsets, targets, weights, skip, dist, pq, on_relax=None):
+    # the relaxation loop as it was before the kernels were specialized, testing the weight type per improvement
+    while pq:
+        current_dist, u = heappop(pq)
+        if current_dist > dist[u]:
+            continue
+        for i in range(offsets[u], offsets[u+1]):
+            if skip[i]:
+                continue
+            v = targets[i]
+            alt_dist = dist[u] + weights[i]
+            if alt_dist < dist[v]:
+                if globals.WEIGHT_TYPE is float and isclose(alt_dist, dist[v], abs_tol=1e-9):
+                    continue
+                dist[v] = alt_dist
+                heappush(pq, (alt_dist, v))
+
+
+def _time_per_edge(searches, csr, repeats):
+    """
+    Returns the best time per scanned edge of each search in nanoseconds. The searches take turns, with the garbage
+    collector disabled as in timeit, so they are measured under the same conditions.
+    """
+    offsets, targets, weights, neg = csr.lists()
+    best = [inf] * len(searches)
+    gc.disable()
+    try:
+        for _ in range(repeats):
+            for k, search in enumerate(searches):
+                dist = [infinity()] * csr.n
+                dist[0] = globals.WEIGHT_TYPE(0)
+                start = time.perf_counter()
+                search(offsets, targets, weights, neg, dist, [(dist[0], 0)])
+                best[k] = min(best[k], time.perf_counter() - start)
+    finally:
+        gc.enable()
+
+    scanned = sum(offsets[u+1] - offsets[u] for u in range(csr.n) if dist[u] != infinity())
+    return [t / max(scanned, 1) * 1e9 for t in best]
+
+
+def benchmark(n: int, scalar: int, repeats: int):
+    graph = nx.gnm_random_graph(n, scalar * n, directed=True, seed=rand.randrange(2**32))
+    print(f"random graph with {n} vertices and {scalar * n} edges, single source Dijkstra")
+    print(f"{'type':<10}{'kernel':<24}{'ns/edge':>10}{'dispatching ns/edge':>22}{'speedup':>9}")
+
+    for weight_type in [int, float, "decimal"]:
+        globals.change_weight_type(weight_type)
+        csr = CSRGraph.from_dict({u: {v: _get_weight((1.0, 0.0)) for v in graph.neighbors(u)} for u in graph.nodes})
+
+        search = search_strategy()
+        dispatching, specialized = _time_per_edge([_dispatching_search, search], csr, repeats)
+        print(f"{globals.WEIGHT_TYPE.__name__:<10}{search.__name__:<24}{specialized:>10.1f}{dispatching:>22.1f}"
+              f"{dispatching / specialized:>9.2f}")
+
+    globals.change_weight_type(float)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure the per-edge relaxation cost of the Dijkstra kernels")
+    parser.add_argument("--vertices", type=int, default=20_000)
+    parser.add_argument("--scalar", type=int, default=6, help="Number of edges per vertex")
+    parser.add_argument("--repeats", type=int, default=5, help="Repetitions per measurement, the best is reported")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rand.seed(args.seed)
+    benchmark(args.vertices, args.scalar, args.repeats)
@@ -0,0 +1,16 @@
+import argparse
+
+from src.utils.graph_file import convert_json_graph
+import src.globals as globals
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Convert JSON graphs to the binary graph format")
+    parser.add_argument("paths", nargs="+", help="JSON graph files")
+    parser.add_argument("--type", type=str, default="float", help="Data type to use: int, float or decimal")
+    parser.add_argument("--only-cc", action="store_true", help="Keep only the component reachable from vertex 0")
+    args = parser.parse_args()
+
+    globals.change_weight_type(args.type)
+    for path in args.paths:
+        print(convert_json_graph(path, only_cc=args.only_cc))
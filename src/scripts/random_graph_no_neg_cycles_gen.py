@@ -8,9 +8,8 @@ from pathlib import Path
 import networkx as nx
 
 import src.globals as globals
-from src.scripts.bellman_ford import standard_bellman_ford
+from src.fineman.core_functions import find_negative_cycle
 from src.scripts.synthetic_graph_generator import _get_weight
-from src.utils.cycle_error import NegativeCycleError
 
 
 def _swap_sign_of_neg_edge_in_cycle(graph, cycle):
@@ -103,13 +102,11 @@ def generate_random_no_neg_cycles_graph_2(n,scalar,ratio: tuple[float,float]):
     for u,v in G.edges():
         graph[u][v] = _get_weight(ratio)
 
-    while True:
-        try:
-            standard_bellman_ford(graph,0,with_parent=True)
-        except NegativeCycleError as e:
-            _swap_sign_of_neg_edge_in_cycle(graph, e.get_cycle()[:-1])
-            continue
-        break
+    # repair the negative cycles reachable from 0 one at a time
+    cycle = find_negative_cycle(graph, [0])
+    while cycle is not None:
+        _swap_sign_of_neg_edge_in_cycle(graph, cycle[:-1])
+        cycle = find_negative_cycle(graph, [0])
 
     json_graph, neg_count = _graph_to_json(graph)
     ratio_str = str(ratio[1]).replace(".","")
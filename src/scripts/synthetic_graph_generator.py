@@ -14,11 +14,12 @@ import src.globals as globals
 
 def _get_weight(weights):
     is_pos = rand.choices([True, False], weights)[0]
-    if globals.WEIGHT_TYPE is Decimal:
+    weight_type = globals.WEIGHT_TYPE
+    if weight_type is Decimal:
         start, end = (0, 30_000) if is_pos else (-10_000, -1000)
         rand_int = rand.randint(start, end)
         return Decimal(rand_int) / Decimal(1000)
-    elif globals.WEIGHT_TYPE is float:
+    elif weight_type is float:
         start, end = (0.0, 30.0) if is_pos else (-10.0, -0.01)
         return round(rand.uniform(start, end), 2)
     else:
@@ -1,3 +1,4 @@
+import argparse
 import datetime
 import os
 
@@ -52,7 +53,9 @@ def load_new_graph(graph_info):
     graph,_ = load_test_case(Path(GRAPHS_PATH + new_path + ".json"))
     return graph, new_path
 
-def time_algorithms():
+def time_algorithms(baseline = "standard", hop_bounded = False, components = False):
+    bellman_ford = BASELINES[baseline]
+
     if not os.path.isdir(Path.cwd() / "empiric_data"):
         os.makedirs(Path.cwd() / "empiric_data")
 
@@ -60,7 +63,7 @@ def time_algorithms():
     files = sorted(files, key=lambda x: (x.split("_")[0], int(x.split("_")[1]), int(x.split("_")[2]), x.split("_")[3]))
 
     dte = datetime.datetime.now().strftime("%Y-%m-%d-%H-%M-%S")
-    name = f"{dte}" + "_SSSP_comparison"
+    name = f"{dte}" + "_SSSP_comparison" + ("" if baseline == "standard" else f"_{baseline}")
     os.makedirs(Path.cwd() / "empiric_data" / f"{name}")
     file_path = Path.cwd() / "empiric_data" / f"{name}" / f"{name}.csv"
 
@@ -80,22 +83,21 @@ def time_algorithms():
         while count < 20:
             print(count)
             try:
-                bford_graph = graph.copy()
                 if rand.random() > 0.5:
                     fineman_start_time = time.time()
-                    result2 = fineman(graph, 0)
+                    result2 = fineman(graph, 0, hop_bounded=hop_bounded, components=components)
                     fineman_end_time = time.time()
 
                     bford_start_time = time.time()
-                    result1 = standard_bellman_ford(bford_graph, 0, False)
+                    result1 = bellman_ford(graph, 0, False)
                     bford_end_time = time.time()
                 else:
                     bford_start_time = time.time()
-                    result1 = standard_bellman_ford(bford_graph, 0, False)
+                    result1 = bellman_ford(graph, 0, False)
                     bford_end_time = time.time()
 
                     fineman_start_time = time.time()
-                    result2 = fineman(graph, 0)
+                    result2 = fineman(graph, 0, hop_bounded=hop_bounded, components=components)
                     fineman_end_time = time.time()
 
                     assert np.allclose(result1, result2, atol=1e-9)
@@ -195,9 +197,18 @@ def get_graph_file_name(run, graph_info):
 
 
 def main():
+    parser = argparse.ArgumentParser(description="Time Fineman's algorithm against a Bellman-Ford baseline")
+    parser.add_argument("--baseline", choices=list(BASELINES), default="standard",
+                        help="Bellman-Ford variant to compare against")
+    parser.add_argument("--hop-bounded", action="store_true",
+                        help="Let the elimination rounds hand over to the Bellman-Ford/Dijkstra hybrid")
+    parser.add_argument("--components", action="store_true",
+                        help="Remove the negative edges per strongly connected component")
+    args = parser.parse_args()
+
     profiler =  cProfile.Profile()
     profiler.enable()
-    time_algorithms()
+    time_algorithms(args.baseline, args.hop_bounded, args.components)
     profiler.disable()
 
     stats = pstats.Stats(profiler).sort_stats(SortKey.CUMULATIVE)
@@ -0,0 +1,18 @@
+import pytest
+
+import src.globals as globals
+
+
+@pytest.fixture(autouse=True)
+def reset_weight_type():
+    yield
+    globals.change_weight_type(float)
+
+
+@pytest.fixture
+def weight_type(request):
+    """
+    Sets the weight type given by indirect parametrization, which reset_weight_type restores afterwards.
+    """
+    globals.change_weight_type(request.param)
+    return request.param
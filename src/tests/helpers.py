@@ -0,0 +1,7 @@
+from math import isclose
+
+
+def assert_distances_are_close(actual, expected):
+    assert len(actual) == len(expected)
+    for i in range(len(actual)):
+        assert actual[i] == expected[i] or isclose(actual[i], expected[i], abs_tol=1e-9)
@@ -1,13 +1,52 @@
+import random
+
+import numpy as np
 import pytest
 
 from src.fineman import reweight_graph
-from src.fineman.betweenness_reduction import _construct_h, betweenness_reduction
-from src.fineman.core_functions import betweenness
+from src.fineman.betweenness_reduction import _star_bfd, betweenness_reduction
+from src.fineman.core_functions import betweenness, multi_source_h_hop_sssp, super_source_bfd, transpose_graph
+from src.fineman.csr_graph import CSRGraph
+from src.utils import NegativeCycleError
 from src.scripts import generate_double_tree
 from src.utils.load_test_case import load_test_case
 
 TESTDATA_FILEPATH = "src/tests/test_data/graphs/"
 
+def _construct_h(graph, T, distances):
+    """
+    Constructs the graph H of the betweenness reduction, with an edge from every t in T to every other vertex v
+    weighted by distances[t][0][v] and one from v back to t weighted by distances[t][1][v]. Both t and v may lie in
+    T, in which case only the lighter of the two parallel edges is kept.
+    """
+    n = len(graph)
+    vertices = np.arange(n)
+
+    sources, targets, weights = [], [], []
+    for t in T:
+        others = vertices[vertices != t]
+        t_vertex = np.full(len(others), t)
+
+        sources += [t_vertex, others]
+        targets += [others, t_vertex]
+        weights += [np.asarray(distances[t][0][:n])[others], np.asarray(distances[t][1][:n])[others]]
+
+    if not T:
+        sources, targets, weights = [np.empty(0, dtype=np.int64)], [np.empty(0, dtype=np.int64)], [np.empty(0)]
+    sources, targets, weights = np.concatenate(sources), np.concatenate(targets), np.concatenate(weights)
+
+    # the lightest edge comes first among its parallel edges
+    order = np.lexsort((weights, targets, sources))
+    first = np.ones(len(order), dtype=bool)
+    first[1:] = (np.diff(sources[order]) != 0) | (np.diff(targets[order]) != 0)
+    edges = order[first]
+    h_graph = CSRGraph.from_edges(n, sources[edges], targets[edges], weights[edges])
+
+    if isinstance(graph, dict):
+        return h_graph.to_dict(), h_graph.edge_set()
+    return h_graph, h_graph.neg_mask
+
+
 def _assert_reduced_betweenness(price_function, graph, neg_edges, t_neg_edges, beta, threshold):
     assert any(betweenness(u, v, graph, neg_edges, t_neg_edges, beta) > threshold for v in graph.keys() for u in graph.keys())
 
@@ -65,6 +104,18 @@ def test_construction_of_h_with_multiple_elements_in_T(filename, T, distances):
     assert all(h_graph[t][v] == 0 for t in T for v in h_graph.keys() if t != v)
 
 
+def test_construction_of_h_keeps_lighter_edge_between_elements_of_T():
+    graph, _ = load_test_case(TESTDATA_FILEPATH + "small_graph_with_neg_edges.json")
+    n = len(graph)
+    distances = {1: ([5] * n, [7] * n), 2: ([3] * n, [-2] * n)}
+
+    h_graph, _ = _construct_h(CSRGraph.from_dict(graph), [1, 2], distances)
+
+    assert h_graph.m == 2 * (2 * (n - 1)) - 2
+    assert h_graph.to_dict()[1][2] == -2
+    assert h_graph.to_dict()[2][1] == 3
+
+
 @pytest.mark.parametrize("depth",[2,3,4,5,6])
 def test_betweenness_reduction_reduces_betweenness_on_double_tree_graph(depth):
     c = 3
@@ -89,3 +140,30 @@ def test_betweenness_reduction_successful_on_path_with_large_neg_edges(length):
 
     _assert_reduced_betweenness(price_function, graph, neg_edges, t_neg_edges, beta, (len(graph))/tau)
 
+
+@pytest.mark.parametrize("filename", [
+    "graph_with_neg_edges.json",
+    "path_100_with_large_neg_edges.json",
+    "9_vertex_dag_sandwich.json",
+    "graph_with_neg_cycle.json",
+    "negative_cycle_4.json"
+])
+@pytest.mark.parametrize("sample_size,l", [(1, 2), (3, 6), (6, 1)])
+def test_star_bfd_matches_constructed_h(filename, sample_size, l):
+    graph, _ = load_test_case(TESTDATA_FILEPATH + filename)
+    csr = CSRGraph.from_dict(graph)
+    t_csr = csr.transpose()
+    T = random.Random(sample_size).sample(range(csr.n), min(sample_size, csr.n))
+    dists_from_T = multi_source_h_hop_sssp(T, csr, csr.neg_mask, 2)
+    dists_to_T = multi_source_h_hop_sssp(T, t_csr, t_csr.neg_mask, 2)
+    h_graph, h_neg_edges = _construct_h(csr, T, {x: (dists_from_T[i], dists_to_T[i]) for i, x in enumerate(T)})
+
+    try:
+        expected = super_source_bfd(h_graph, h_neg_edges, l, cycleDetection=True).tolist()
+    except NegativeCycleError:
+        with pytest.raises(NegativeCycleError):
+            _star_bfd(csr, T, dists_from_T, dists_to_T, l)
+        return
+
+    assert _star_bfd(csr, T, dists_from_T, dists_to_T, l).tolist() == expected
+
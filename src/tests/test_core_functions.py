@@ -1,6 +1,9 @@
 import pytest
+import numpy as np
 from src.fineman.core_functions import *
+from src.fineman.csr_graph import CSRGraph
 from src.utils.load_test_case import load_test_case
+import src.globals as globals
 
 TESTDATA_FILEPATH = "src/tests/test_data/graphs/"
 
@@ -96,6 +99,22 @@ def test_bellman_ford_implementation(filename, expected):
     assert [min(dist[v][0],dist[v][1]) for v in range(len(graph))] == expected
 
 
+def test_dijkstra_and_bellman_ford_save_sources_in_lists():
+    graph, neg_edges = load_test_case(TESTDATA_FILEPATH + "small_graph_with_neg_edges.json")
+    parent, anc_in_I = [-1] * len(graph), [-1] * len(graph)
+
+    initial_dist = [[inf,inf] for _ in range(len(graph))]
+    initial_dist[0][0] = 0
+    dist = dijkstra(graph, neg_edges, initial_dist, [(0, 0)], {0}, parent, anc_in_I, save_source=True)
+    assert [dist[v][0] for v in range(len(graph))] == [0, 5, 11, inf, 6, 7]
+    assert parent == [-1, 0, 1, -1, 0, 4]
+    assert anc_in_I == [-1, 0, 0, -1, 0, 0]
+
+    bellman_ford(graph, neg_edges, dist, {0}, anc_in_I, parent, save_source=True)
+    assert parent == [-1, 0, 1, 0, 0, 4]
+    assert anc_in_I == [-1, 0, 0, 0, 0, 0]
+
+
 @pytest.mark.parametrize("filename,beta,expected", [
     ("graph_with_no_edges.json", 1, [ 0, inf, inf, inf, inf, inf]),
     ("disconnected_graph.json", 0, [ 0, 1, 2, inf, inf, inf]),
@@ -201,6 +220,50 @@ def test_super_source_bfd_cycle_detection_on_graphs_with_neg_cycles(filename, be
         super_source_bfd(graph, neg_edges, beta, cycleDetection=True)
 
 
+def _assert_is_negative_cycle(graph, cycle):
+    assert cycle[0] == cycle[-1]
+    assert len(set(cycle[:-1])) == len(cycle) - 1
+    assert sum(graph[u][v] for u, v in zip(cycle, cycle[1:])) < 0
+
+
+@pytest.mark.parametrize("filename", ["negative_cycle_4.json", "graph_with_neg_cycle.json", "negative_cycle_6.json",
+                                      "small_negative_cycle.json", "negative_cycle.json"])
+@pytest.mark.parametrize("weight_type", ["int", "float", "decimal"])
+def test_find_negative_cycle_on_graphs_with_neg_cycles(filename, weight_type):
+    globals.change_weight_type(weight_type)
+    graph, _ = load_test_case(TESTDATA_FILEPATH + filename)
+
+    cycle = find_negative_cycle(graph)
+
+    _assert_is_negative_cycle(graph, cycle)
+    globals.change_weight_type(float)
+
+
+@pytest.mark.parametrize("filename", ["small_graph_with_neg_edges.json", "9_vertex_dag_sandwich.json",
+                                      "small_pos_cycle.json", "graph_with_no_edges.json"])
+def test_find_negative_cycle_on_graphs_without_neg_cycles(filename):
+    graph, _ = load_test_case(TESTDATA_FILEPATH + filename)
+
+    assert find_negative_cycle(graph) is None
+
+
+def test_find_negative_cycle_only_searches_from_sources():
+    graph = {0: {1: 1}, 1: {}, 2: {3: -2}, 3: {2: 1}}
+
+    assert find_negative_cycle(graph, [0]) is None
+    assert find_negative_cycle(graph, [2]) in ([2, 3, 2], [3, 2, 3])
+
+
+@pytest.mark.parametrize("filename,beta", [("negative_cycle_4.json", 2), ("graph_with_neg_cycle.json", 3)])
+def test_super_source_bfd_reports_negative_cycle(filename, beta):
+    graph, neg_edges = load_test_case(TESTDATA_FILEPATH + filename)
+
+    with pytest.raises(NegativeCycleError) as error:
+        super_source_bfd(graph, neg_edges, beta, cycleDetection=True)
+
+    _assert_is_negative_cycle(graph, error.value.get_cycle())
+
+
 @pytest.mark.parametrize("source,target,beta,expected", [
     (0,7,0,set()),
     (0,7,1,{0,1,2,3,4,5,6,7}),
@@ -499,3 +562,61 @@ def test_independent_set_negative_cycle_not_detected_small(subset):
     with pytest.raises(NegativeCycleError):
         subset_bfd(graph,neg_edges,subset,1,subset,True)
 
+
+
+def test_bellman_ford_relaxes_parallel_negative_edges_to_the_minimum():
+    graph = CSRGraph.from_dict({0: {2: -1}, 1: {2: -3, 3: -2}, 2: {}, 3: {}})
+    dist = np.array([[0, 0, inf, 5], [inf, inf, inf, inf]])
+    parent = np.full(4, -1)
+    anc_in_I = np.full(4, -1)
+
+    dist = bellman_ford(graph, graph.neg_mask, dist, I_prime={0, 1}, anc_in_I=anc_in_I, parent=parent, save_source=True)
+
+    assert dist[1].tolist() == [inf, inf, -3, -2]
+    assert parent.tolist() == [-1, -1, 1, 1]
+    assert anc_in_I.tolist() == [-1, -1, 1, 1]
+
+
+@pytest.mark.parametrize("filename,sources,beta", [
+    ("graph_with_neg_edges.json", [0, 4, 13], 2),
+    ("path_tricky.json", [0, 1, 2, 3, 4, 5], 3),
+    ("negative_cycle_4.json", [2, 0], 4),
+    ("graph_with_no_edges.json", [1], 1)
+])
+def test_multi_source_h_hop_sssp_matches_single_source(filename, sources, beta):
+    graph, neg_edges = load_test_case(TESTDATA_FILEPATH + filename)
+
+    actual = multi_source_h_hop_sssp(sources, graph, neg_edges, beta)
+
+    assert actual == [h_hop_sssp(source, graph, neg_edges, beta) for source in sources]
+
+def _frozen(graph):
+    return {u: dict(neighborhood) for u, neighborhood in graph.items()}
+
+@pytest.mark.parametrize("search", [
+    lambda graph, neg_edges: subset_bfd(graph, neg_edges, [0, 1], 2),
+    lambda graph, neg_edges: super_source_bfd(graph, neg_edges, 2, cycleDetection=True),
+    lambda graph, neg_edges: super_source_bfd_save_rounds(graph, neg_edges, range(len(graph)), 2),
+    lambda graph, neg_edges: h_hop_sssp(0, graph, neg_edges, 2),
+    lambda graph, neg_edges: multi_source_h_hop_sssp([0, 2], graph, neg_edges, 2)
+])
+def test_searches_leave_the_graph_untouched(search):
+    graph, neg_edges = load_test_case(TESTDATA_FILEPATH + "small_graph_with_neg_edges.json")
+    expected, expected_neg_edges = _frozen(graph), set(neg_edges)
+
+    search(graph, neg_edges)
+
+    assert graph == expected
+    assert list(graph) == list(expected)
+    assert neg_edges == expected_neg_edges
+
+@pytest.mark.parametrize("filename", ["graph_with_neg_edges.json", "path_100_with_large_neg_edges.json", "dag_flow.json"])
+def test_super_source_bfd_save_rounds_stores_every_round(filename):
+    graph, _ = load_test_case(TESTDATA_FILEPATH + filename)
+    csr = CSRGraph.from_dict(graph)
+
+    rounds = super_source_bfd_save_rounds(csr, csr.neg_mask, range(csr.n), 3)
+
+    assert isinstance(rounds, np.ndarray) and rounds.shape == (4, csr.n)
+    for i in range(4):
+        assert (rounds[i] == super_source_bfd(csr, csr.neg_mask, i)).all()
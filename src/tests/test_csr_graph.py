@@ -0,0 +1,178 @@
+import numpy as np
+import pytest
+
+from src.fineman.core_functions import *
+from src.fineman.csr_graph import CSRGraph, to_csr, _tolerant_improvements
+from src.fineman.finemans_algorithm import fineman
+from src.scripts.double_tree_graph_generator import generate_double_tree
+from src.utils.load_test_case import load_test_case
+
+TESTDATA_FILEPATH = "src/tests/test_data/graphs/"
+
+@pytest.mark.parametrize("filename", [
+    "complete_4_vertices_graph_with_no_neg_edges.json",
+    "small_graph_with_neg_edges.json",
+    "tree_graph_single_root_with_100_children.json",
+    "graph_with_no_edges.json",
+    "disconnected_graph.json",
+    "graph_with_neg_edges.json"
+])
+def test_dict_round_trip(filename):
+    graph, neg_edges = load_test_case(TESTDATA_FILEPATH + filename)
+    csr = CSRGraph.from_dict(graph)
+
+    assert csr.n == len(graph)
+    assert csr.m == sum(len(neighbors) for neighbors in graph.values())
+    assert csr.to_dict() == graph
+    assert csr.edge_set() == neg_edges
+
+
+def test_rows_are_sorted_by_target():
+    graph = {0: {3: 1, 1: -2, 2: 4}, 1: {0: 1}, 2: {}, 3: {2: 5, 0: 7}}
+    csr = CSRGraph.from_dict(graph)
+
+    assert csr.offsets.tolist() == [0, 3, 4, 4, 6]
+    assert csr.targets.tolist() == [1, 2, 3, 0, 0, 2]
+    assert csr.weights.tolist() == [-2, 4, 1, 1, 7, 5]
+    assert csr.neg_mask.tolist() == [True, False, False, False, False, False]
+
+
+@pytest.mark.parametrize("filename", [
+    "high_in_degree_graph.json",
+    "small_graph_with_neg_edges.json",
+    "graph_with_neg_edges.json"
+])
+def test_transposing_twice_preserves_edge_order(filename):
+    graph, _ = load_test_case(TESTDATA_FILEPATH + filename)
+    csr = CSRGraph.from_dict(graph)
+    t_t_csr = csr.transpose().transpose()
+
+    assert (t_t_csr.offsets == csr.offsets).all()
+    assert (t_t_csr.targets == csr.targets).all()
+    assert (t_t_csr.weights == csr.weights).all()
+    assert (t_t_csr.neg_mask == csr.neg_mask).all()
+
+
+def test_neg_mask_given_as_edge_set():
+    graph, _ = load_test_case(TESTDATA_FILEPATH + "small_graph_with_neg_edges.json")
+    out_0 = {(0, v) for v in graph[0]}
+
+    csr = to_csr(graph, out_0)
+
+    assert csr.edge_set() == out_0
+    assert csr.edge_set() == csr.with_neg_mask(csr.out_edge_mask({0})).edge_set()
+
+
+def test_edge_subgraph_keeps_selected_edges():
+    graph, neg_edges = load_test_case(TESTDATA_FILEPATH + "graph_with_neg_edges.json")
+    csr = CSRGraph.from_dict(graph)
+
+    subgraph = csr.edge_subgraph(~csr.neg_mask)
+
+    assert subgraph.n == csr.n
+    assert subgraph.to_dict() == {u: {v: w for v, w in edges.items() if (u, v) not in neg_edges}
+                                  for u, edges in graph.items()}
+
+
+@pytest.mark.parametrize("filename,beta", [
+    ("graph_with_neg_edges.json", 2),
+    ("path_tricky.json", 3),
+    ("small_graph_with_neg_edges.json", 1)
+])
+def test_core_functions_agree_on_dict_and_csr_graphs(filename, beta):
+    graph, neg_edges = load_test_case(TESTDATA_FILEPATH + filename)
+    csr = CSRGraph.from_dict(graph)
+
+    assert h_hop_sssp(0, csr, csr.neg_mask, beta).tolist() == h_hop_sssp(0, graph, neg_edges, beta)
+    assert super_source_bfd(csr, csr.neg_mask, beta).tolist() == super_source_bfd(graph, neg_edges, beta)
+
+    price_function = super_source_bfd(graph, neg_edges, beta)
+    reweighted_csr, _ = reweight_graph(csr, price_function)
+    reweighted_graph, reweighted_neg_edges = reweight_graph(graph, price_function)
+    assert reweighted_csr.to_dict() == reweighted_graph
+    assert reweighted_csr.edge_set() == reweighted_neg_edges
+
+
+@pytest.mark.parametrize("depth", [3, 5])
+def test_fineman_accepts_csr_graph(depth):
+    graph, _ = generate_double_tree(depth, -(depth * 2))
+    csr = CSRGraph.from_dict(graph)
+
+    assert fineman(csr, 0, seed=depth) == fineman(graph, 0, seed=depth)
+
+
+@pytest.mark.parametrize("new,old,expected", [
+    (1.0, 2.0, True),
+    (1.0, 1.0 + 1e-12, False),
+    (-1e-12, 0.0, False),
+    (5.0, float("inf"), True),
+    (float("inf"), float("inf"), False),
+    (-float("inf"), 0.0, True),
+    (2.0, 1.0, False)
+])
+def test_tolerant_improvements_match_isclose(new, old, expected):
+    assert _tolerant_improvements(np.array([new]), np.array([old])).tolist() == [expected]
+
+
+def test_reweighting_composes_price_functions_lazily():
+    graph, _ = load_test_case(TESTDATA_FILEPATH + "graph_with_neg_edges.json")
+    csr = CSRGraph.from_dict(graph)
+    phi_1 = np.arange(csr.n, dtype=float)
+    phi_2 = -2 * np.arange(csr.n, dtype=float)
+
+    reweighted = csr.reweight(phi_1).reweight(phi_2)
+
+    assert reweighted.base_weights is csr.weights
+    assert reweighted._weights is None
+    assert reweighted.potential.tolist() == (phi_1 + phi_2).tolist()
+    assert reweighted.to_dict() == reweight_graph(reweight_graph(graph, phi_1)[0], phi_2)[0]
+
+
+def test_transposed_topology_is_shared_between_reweightings():
+    graph, _ = load_test_case(TESTDATA_FILEPATH + "graph_with_neg_edges.json")
+    csr = CSRGraph.from_dict(graph)
+    reweighted = csr.reweight(np.ones(csr.n))
+
+    assert reweighted.transpose().targets is csr.transpose().targets
+    assert reweighted.transpose().to_dict() == CSRGraph.from_dict(reweighted.to_dict()).transpose().to_dict()
+
+
+def test_transpose_is_computed_once_per_view():
+    graph, _ = load_test_case(TESTDATA_FILEPATH + "graph_with_neg_edges.json")
+    csr = CSRGraph.from_dict(graph)
+    t_csr = csr.transpose()
+
+    assert csr.transpose() is t_csr
+    assert t_csr.transpose() is csr
+    assert (h_hop_stsp(3, csr, t_csr.neg_mask, 2) == h_hop_stsp(3, CSRGraph.from_dict(graph), t_csr.neg_mask, 2)).all()
+
+    # a fresh view of the transpose transposes back to the same edges
+    t_t_csr = CSRGraph(t_csr.offsets, t_csr.targets, t_csr.weights, t_csr.neg_mask).transpose()
+    assert (t_t_csr.targets == csr.targets).all() and (t_t_csr.weights == csr.weights).all()
+
+    reweighted = csr.reweight(np.arange(csr.n))
+    assert reweighted.transpose() is not t_csr
+    assert reweighted.transpose().to_dict() == CSRGraph.from_dict(reweighted.to_dict()).transpose().to_dict()
+
+
+@pytest.mark.parametrize("filename", [
+    "graph_with_neg_edges.json",
+    "small_graph_with_neg_edges.json",
+    "high_in_degree_graph.json"
+])
+def test_sparse_reweighting_updates_negative_edge_index(monkeypatch, filename):
+    monkeypatch.setattr("src.fineman.csr_graph.INCREMENTAL_REWEIGHT_FRACTION", 0.5)
+    graph, _ = load_test_case(TESTDATA_FILEPATH + filename)
+    csr = CSRGraph.from_dict(graph)
+    csr.weights, csr.negative_edge_index()
+    phi = np.zeros(csr.n)
+    phi[0], phi[csr.n - 1] = -3, 2
+
+    reweighted = csr.reweight(phi)
+    recomputed = CSRGraph(csr.offsets, csr.targets, csr.weights, potential=phi)
+
+    assert reweighted._neg_index is not None and recomputed._neg_index is None
+    assert reweighted.weights.tolist() == recomputed.weights.tolist()
+    assert reweighted.neg_mask.tolist() == recomputed.neg_mask.tolist()
+    assert reweighted.neg_count == recomputed.neg_count
+    assert reweighted.neg_vertices() == get_set_of_neg_vertices(recomputed)
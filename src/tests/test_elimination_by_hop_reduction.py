@@ -1,10 +1,67 @@
+from math import ceil
+
+import numpy as np
 import pytest
 
-from src.fineman.elimination_by_hop_reduction import construct_h, _elimination_by_hop_reduction
+from src.fineman.core_functions import super_source_bfd, super_source_bfd_save_rounds, _negative_entries
+from src.fineman.csr_graph import CSRGraph, to_csr
+from src.fineman.elimination_by_hop_reduction import _elimination_by_hop_reduction, _layer_distances
 from src.utils import load_test_case, NegativeCycleError
 
 TESTDATA_FILEPATH = "src/tests/test_data/graphs/"
 
+
+def _construct_h(graph, neg_edges, dists, R_set, r):
+    """
+    Constructs the graph H, in which every vertex v in R_set is copied into r+1 layers (v,0),...,(v,r) and every
+    other vertex v only appears as (v,0). An edge of G is taken in all layers of its source, and a negative edge
+    moves one layer up when it enters a vertex of R_set. Edges are reweighted by the layer distances in dists.
+
+    :return: H, its negative edges, and the mapping of (v,i) to vertices of H. For a CSRGraph input the mapping is
+    an array of the vertex (v,0) of every v, where (v,i) is vertex mapping[v]+i.
+    """
+    csr = to_csr(graph, neg_edges)
+    n = csr.n
+
+    in_R = np.zeros(n, dtype=bool)
+    in_R[list(R_set)] = True
+    copies = np.where(in_R, r+1, 1)
+    base = np.zeros(n, dtype=np.int64)
+    np.cumsum(copies[:-1], out=base[1:])
+
+    layer_dists = _layer_distances(dists, len(dists), n)
+
+    u, v, w, neg = csr.sources, csr.targets, csr.weights, csr.neg_mask
+    sources, targets, weights = [], [], []
+
+    # cases 1-8: an edge (u,v) goes from (u,j) to (v,j) - or (v,j+1) if negative - where v only has layer 0
+    # outside of R_set, and the negative edges out of (u,r) are dropped
+    for j in range(r+1):
+        active = (in_R[u] | (j == 0)) & ~(neg & in_R[u] & (j == r))
+        target_layer = np.where(in_R[v], j + neg, 0)[active]
+        su, sv = u[active], v[active]
+
+        sources.append(base[su] + j)
+        targets.append(base[sv] + target_layer)
+        weights.append(w[active] + layer_dists[j][su] - layer_dists[target_layer, sv])
+
+    # case 9: the copies of a vertex of R_set form a cycle (u,0) -> (u,1) -> ... -> (u,r) -> (u,0)
+    R = np.flatnonzero(in_R)
+    for j in range(r+1):
+        next_layer = (j + 1) % (r+1)
+        sources.append(base[R] + j)
+        targets.append(base[R] + next_layer)
+        weights.append(0 + layer_dists[j][R] - layer_dists[next_layer][R])
+
+    h = CSRGraph.from_edges(int(copies.sum()), np.concatenate(sources), np.concatenate(targets),
+                            np.concatenate(weights))
+
+    if isinstance(graph, dict):
+        mapping = {(x, i): int(base[x]) + i for x in range(n) for i in range(copies[x])}
+        return h.to_dict(), h.edge_set(), mapping
+    return h, h.neg_mask, base
+
+
 @pytest.mark.parametrize("filename",[
     "small_flow_dag.json",
     "dag_flow.json",
@@ -14,7 +71,7 @@ TESTDATA_FILEPATH = "src/tests/test_data/graphs/"
 def test_construction_of_h_with_empty_R_set(filename):
     graph, neg_edges = load_test_case(TESTDATA_FILEPATH + filename)
 
-    h, actual_neg_edges, mapping = construct_h(graph, neg_edges, [[0] * len(graph)], set(), 0)
+    h, actual_neg_edges, mapping = _construct_h(graph, neg_edges, [[0] * len(graph)], set(), 0)
 
     expected_neg_edges = {(u,v) for u, edges in h.items() for v, w in edges.items()  if w < 0}
 
@@ -47,7 +104,7 @@ def test_construction_of_h_with_empty_R_set(filename):
 def test_construction_of_h_on_dag(dists, R_set, r, expected_h):
     graph, neg_edges = load_test_case(TESTDATA_FILEPATH + "small_flow_dag.json")
 
-    h, _, mapping = construct_h(graph, neg_edges, dists, R_set, r)
+    h, _, mapping = _construct_h(graph, neg_edges, dists, R_set, r)
 
     inv_mapping = {v:k for k,v in mapping.items()}
 
@@ -74,7 +131,7 @@ def test_construction_of_h_on_dag(dists, R_set, r, expected_h):
 def test_construction_of_h_on_random_graph(dists, R_set, r, expected_h):
     graph, neg_edges = load_test_case(TESTDATA_FILEPATH + "graph_with_neg_edges.json")
 
-    h, _, mapping = construct_h(graph, neg_edges, dists, R_set, r)
+    h, _, mapping = _construct_h(graph, neg_edges, dists, R_set, r)
 
     inv_mapping = {v: k for k, v in mapping.items()}
 
@@ -103,4 +160,23 @@ def test_elimination_returns_same_length_price_function_as_graphs(filename, r):
 
     distances = _elimination_by_hop_reduction(graph, neg_edges, r)
 
-    assert len(distances) == len(graph.keys())
\ No newline at end of file
+    assert len(distances) == len(graph.keys())
+
+
+@pytest.mark.parametrize("filename", [
+    "graph_with_neg_edges.json",
+    "dag_flow.json",
+    "path_100_with_large_neg_edges.json",
+    "9_vertex_dag_sandwich.json",
+    "path_with_only_neg_edges.json"
+])
+@pytest.mark.parametrize("r", [1, 2, 4])
+def test_implicit_h_matches_constructed_h(filename, r):
+    graph, neg_edges = load_test_case(TESTDATA_FILEPATH + filename)
+    csr = CSRGraph.from_dict(graph)
+    dists = super_source_bfd_save_rounds(csr, csr.neg_mask, range(csr.n), r)
+    h, h_neg_edges, mapping = _construct_h(csr, csr.neg_mask, dists, _negative_entries(dists[r]), r)
+    expected = super_source_bfd(h, h_neg_edges, ceil(len(neg_edges) / r), cycleDetection=True)[mapping]
+
+    assert _elimination_by_hop_reduction(graph, neg_edges, r) == expected.tolist()
+
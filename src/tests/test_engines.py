@@ -0,0 +1,157 @@
+import random
+
+import pytest
+
+import src.fineman.finemans_algorithm as finemans_algorithm
+import src.globals as globals
+from src.fineman.csr_graph import CSRGraph
+from src.fineman.engines import bellman_ford_dijkstra, goldberg_scaling, hop_bounded_is_cheaper, select_engine
+from src.fineman.finemans_algorithm import fineman
+from src.scripts import standard_bellman_ford
+from src.scripts.double_tree_graph_generator import generate_double_tree
+from src.tests.helpers import assert_distances_are_close
+from src.utils import NegativeCycleError
+from src.utils.load_test_case import load_test_case
+
+TESTDATA_FILEPATH = "src/tests/test_data/graphs/"
+
+
+@pytest.mark.parametrize("engine,weight_type", [
+    ("bellman-ford-dijkstra", "int"),
+    ("bellman-ford-dijkstra", "float"),
+    ("bellman-ford-dijkstra", "decimal"),
+    ("goldberg", "int"),
+    ("auto", "int"),
+    ("auto", "float")
+])
+@pytest.mark.parametrize("filename", [
+    "small_graph_with_neg_edges.json",
+    "path_100_with_large_neg_edges.json",
+    "9_vertex_dag_sandwich.json",
+    "tree_graph_two_layered_negative_root.json",
+    "disconnected_graph.json"
+])
+def test_engines_match_bellman_ford(engine, weight_type, filename):
+    globals.change_weight_type(weight_type)
+    graph, _ = load_test_case(TESTDATA_FILEPATH + filename)
+
+    actual = fineman(graph, 0, weight_type=weight_type, engine=engine)
+
+    assert_distances_are_close(actual, standard_bellman_ford(graph, 0))
+
+
+@pytest.mark.parametrize("engine", ["bellman-ford-dijkstra", "goldberg"])
+@pytest.mark.parametrize("depth", [3, 6])
+def test_engines_on_double_tree_graph(engine, depth):
+    graph, _ = generate_double_tree(depth, -(depth * 2))
+
+    actual = fineman(graph, 0, weight_type=int, engine=engine)
+
+    assert_distances_are_close(actual, standard_bellman_ford(graph, 0))
+
+
+@pytest.mark.parametrize("engine", [bellman_ford_dijkstra, goldberg_scaling])
+def test_engines_remove_all_negative_edges(engine):
+    globals.change_weight_type(int)
+    graph, _ = generate_double_tree(5, -10)
+    csr = CSRGraph.from_dict(graph)
+
+    reweighted = engine(csr)
+
+    assert reweighted.neg_count == 0
+    assert reweighted.base_weights is csr.base_weights
+
+
+@pytest.mark.parametrize("engine", ["bellman-ford-dijkstra", "goldberg"])
+@pytest.mark.parametrize("filename", ["negative_cycle_4.json", "graph_with_neg_cycle.json", "negative_cycle_6.json"])
+def test_engines_report_negative_cycles(engine, filename):
+    globals.change_weight_type(int)
+    graph, _ = load_test_case(TESTDATA_FILEPATH + filename)
+
+    with pytest.raises(NegativeCycleError) as error:
+        fineman(graph, 0, weight_type=int, engine=engine)
+
+    cycle = error.value.get_cycle()
+    assert cycle[0] == cycle[-1]
+    assert sum(graph[u][v] for u, v in zip(cycle, cycle[1:])) < 0
+
+
+def test_goldberg_scaling_requires_integer_weights():
+    graph, _ = load_test_case(TESTDATA_FILEPATH + "small_graph_with_neg_edges.json")
+
+    with pytest.raises(ValueError):
+        fineman(graph, 0, weight_type=float, engine="goldberg")
+
+
+def test_unknown_engine_is_rejected():
+    graph, _ = load_test_case(TESTDATA_FILEPATH + "small_graph_with_neg_edges.json")
+
+    with pytest.raises(ValueError):
+        fineman(graph, 0, engine="dial")
+
+
+@pytest.mark.parametrize("weight_type,n,k,expected", [
+    (int, 1000, 10, "bellman-ford-dijkstra"),
+    (float, 1000, 400, "bellman-ford-dijkstra"),
+    (int, 1000, 900, "goldberg"),
+    (float, 1000, 900, "fineman")
+])
+def test_select_engine(weight_type, n, k, expected):
+    globals.change_weight_type(weight_type)
+
+    assert select_engine(n, k) == expected
+
+
+@pytest.mark.parametrize("n,k,expected", [
+    (1000, 1, True),
+    (1000, 5, True),
+    (1000, 41, True),
+    (1000, 42, False),
+    (2, 1, True),
+    (10 ** 6, 5000, False)
+])
+def test_hop_bounded_is_cheaper(n, k, expected):
+    assert hop_bounded_is_cheaper(n, k) == expected
+
+
+@pytest.mark.parametrize("filename", [
+    "small_graph_with_neg_edges.json",
+    "path_100_with_large_neg_edges.json",
+    "tree_graph_two_layered_negative_root.json"
+])
+def test_few_negative_edges_skip_elimination(monkeypatch, filename):
+    graph, _ = load_test_case(TESTDATA_FILEPATH + filename)
+
+    def fail(*args, **kwargs):
+        raise AssertionError("an elimination round ran")
+    monkeypatch.setattr(finemans_algorithm, "elimination_algorithm", fail)
+
+    assert_distances_are_close(fineman(graph, 0, hop_bounded=True), standard_bellman_ford(graph, 0))
+
+
+def _strongly_connected_graph(n, seed):
+    """
+    A cycle through all vertices plus random edges, weighted by a random potential so that no negative cycle exists.
+    """
+    rng = random.Random(seed)
+    price = [rng.randint(0, 20) for _ in range(n)]
+    edges = [(u, (u + 1) % n) for u in range(n)] + [(rng.randrange(n), rng.randrange(n)) for _ in range(2 * n)]
+    graph = {u: {} for u in range(n)}
+    for u, v in edges:
+        if u != v:
+            graph[u][v] = rng.randint(0, 10) + price[u] - price[v]
+    return graph
+
+
+@pytest.mark.parametrize("n,seed", [(30, 1), (80, 2)])
+def test_elimination_rounds_without_hop_bounded_search(monkeypatch, n, seed):
+    rounds = []
+    elimination = finemans_algorithm.elimination_algorithm
+    monkeypatch.setattr(finemans_algorithm, "elimination_algorithm",
+                        lambda *args, **kwargs: rounds.append(1) or elimination(*args, **kwargs))
+    graph = _strongly_connected_graph(n, seed)
+
+    actual = fineman(graph, 0, seed=seed, weight_type=int, hop_bounded=False)
+
+    assert rounds
+    assert_distances_are_close(actual, standard_bellman_ford(graph, 0))
@@ -3,21 +3,17 @@ from math import isclose
 
 import pytest
 
+import src.fineman.finemans_algorithm as finemans_algorithm
 import src.globals as globals
-from src.fineman.finemans_algorithm import fineman
+from src.fineman.finemans_algorithm import fineman, multi_source_fineman
 from src.scripts import standard_bellman_ford
 from src.scripts.double_tree_graph_generator import generate_double_tree
 from src.scripts.random_graph_no_neg_cycles_gen import generate_random_no_neg_cycles_graph_1
+from src.tests.helpers import assert_distances_are_close
 from src.utils import load_test_case, NegativeCycleError
 
 TESTDATA_FILEPATH = "src/tests/test_data/"
 
-def _assert_distances_are_close(actual, expected):
-    assert len(actual) == len(expected)
-    for i in range(len(actual)):
-        assert isclose(actual[i], expected[i], abs_tol=1e-9)
-
-
 @pytest.mark.parametrize("depth", [3, 4, 6, 9])
 @pytest.mark.parametrize("repeat", range(2))
 def test_of_entire_algorithm_on_double_tree_graph(depth, repeat):
@@ -27,7 +23,110 @@ def test_of_entire_algorithm_on_double_tree_graph(depth, repeat):
 
     actual = fineman(graph, 0)
 
-    _assert_distances_are_close(actual, expected)
+    assert_distances_are_close(actual, expected)
+
+
+@pytest.mark.parametrize("depth", [3, 4, 6])
+def test_elimination_rounds_on_whole_double_tree_graph(depth):
+    graph, _ = generate_double_tree(depth, -(depth * 2))
+
+    actual = fineman(graph, 0, seed=depth, hop_bounded=False, components=False)
+
+    assert_distances_are_close(actual, standard_bellman_ford(graph, 0))
+
+
+@pytest.mark.parametrize("filename", [
+    "graphs/tree_graph_single_root_with_100_children.json",
+    "graphs/tree_graph_two_layered_negative_root.json",
+    "graphs/high_in_degree_graph.json",
+    "graphs/small_graph_with_neg_edges.json",
+    "graphs/disconnected_graph.json"
+])
+def test_parents_and_potential_are_those_of_original_graph(filename):
+    graph, _ = load_test_case(TESTDATA_FILEPATH + filename)
+
+    distances, parent, potential = fineman(graph, 0, with_parent=True, with_potential=True)
+
+    assert_distances_are_close(distances, standard_bellman_ford(graph, 0))
+    assert parent[0] == -1
+    for v in graph:
+        if v != 0 and distances[v] < float("inf"):
+            assert isclose(distances[v], distances[parent[v]] + graph[parent[v]][v], abs_tol=1e-9)
+        else:
+            assert parent[v] == -1
+
+    for u in graph:
+        for v, weight in graph[u].items():
+            assert weight + potential[u] - potential[v] >= -1e-9
+
+
+@pytest.mark.parametrize("depth", [3, 5])
+def test_parents_on_double_tree_graph_lead_back_to_source(depth):
+    graph, _ = generate_double_tree(depth, -(depth * 2))
+
+    distances, parent = fineman(graph, 0, with_parent=True)
+
+    assert distances == fineman(graph, 0)
+    for v in graph:
+        steps, u = 0, v
+        while u != 0:
+            u = parent[u]
+            steps += 1
+            assert steps <= len(graph)
+
+
+@pytest.mark.parametrize("filename", ["negative_cycle_4.json", "graph_with_neg_cycle.json", "negative_cycle_6.json",
+                                      "small_negative_cycle.json"])
+def test_negative_cycle_is_reported_in_original_vertices(filename):
+    graph, _ = load_test_case(TESTDATA_FILEPATH + "graphs/" + filename)
+
+    with pytest.raises(NegativeCycleError) as error:
+        fineman(graph, 0)
+
+    cycle = error.value.get_cycle()
+    assert cycle[0] == cycle[-1]
+    assert len(set(cycle[:-1])) == len(cycle) - 1
+    assert sum(graph[u][v] for u, v in zip(cycle, cycle[1:])) < 0
+
+
+@pytest.mark.parametrize("engine", ["fineman", "bellman-ford-dijkstra"])
+@pytest.mark.parametrize("filename", ["negative_cycle_4.json", "graph_with_neg_cycle.json", "negative_cycle_6.json"])
+def test_negative_cycle_is_searched_for_once(monkeypatch, engine, filename):
+    graph, _ = load_test_case(TESTDATA_FILEPATH + "graphs/" + filename)
+
+    def fail(*args, **kwargs):
+        raise AssertionError("the negative cycle was searched for again")
+    monkeypatch.setattr(finemans_algorithm, "find_negative_cycle", fail)
+
+    with pytest.raises(NegativeCycleError) as error:
+        fineman(graph, 0, engine=engine)
+
+    cycle = error.value.get_cycle()
+    assert cycle[0] == cycle[-1]
+    assert sum(graph[u][v] for u, v in zip(cycle, cycle[1:])) < 0
+
+
+@pytest.mark.parametrize("type_str", ["int", "float", "decimal"])
+def test_all_pairs_distances_on_double_tree_graph(type_str):
+    graph, _ = generate_double_tree(4, -8)
+
+    distances = multi_source_fineman(graph, weight_type=type_str)
+
+    assert distances.shape == (len(graph), len(graph))
+    for source in graph:
+        assert_distances_are_close(distances[source], standard_bellman_ford(graph, source))
+    globals.change_weight_type(float)
+
+
+def test_multi_source_distances_follow_order_of_sources():
+    graph, _ = generate_double_tree(3, -6)
+    sources = [5, 0, 5, 2]
+
+    distances = multi_source_fineman(graph, sources)
+
+    assert distances.shape == (len(sources), len(graph))
+    for row, source in enumerate(sources):
+        assert_distances_are_close(distances[row], fineman(graph, source))
 
 
 @pytest.mark.parametrize("filename", [filename for filename in os.listdir("src/tests/test_data/synthetic_graphs")
@@ -46,7 +145,7 @@ def test_of_entire_algorithm_on_various_graph_families(filename):
 
     if not error_raised:
         actual = fineman(graph, 0)
-        _assert_distances_are_close(actual, expected)
+        assert_distances_are_close(actual, expected)
 
 
 @pytest.mark.parametrize("filename", [filename for filename in os.listdir("src/tests/test_data/synthetic_graphs")
@@ -65,7 +164,7 @@ def test_of_entire_algorithm_on_grids(filename):
 
     if not error_raised:
         actual = fineman(graph, 0)
-        _assert_distances_are_close(actual, expected)
+        assert_distances_are_close(actual, expected)
 
 
 @pytest.mark.parametrize("filename", [filename for filename in os.listdir("src/tests/test_data/synthetic_graphs")
@@ -85,7 +184,7 @@ def test_of_entire_algorithm_on_random_graphs_of_varying_size_and_pos_neg_ratio(
 
     if not error_raised:
         actual = fineman(graph, 0)
-        _assert_distances_are_close(actual, expected)
+        assert_distances_are_close(actual, expected)
 
 
 @pytest.mark.parametrize("filename", [filename for filename in os.listdir("src/tests/test_data/synthetic_graphs")
@@ -105,7 +204,7 @@ def test_of_entire_algorithm_on_watts_strogatz_of_varying_parameters(filename, r
 
     if not error_raised:
         actual = fineman(graph, 0)
-        _assert_distances_are_close(actual, expected)
+        assert_distances_are_close(actual, expected)
 
 
 @pytest.mark.parametrize("type_str", ["int", "float", "decimal"])
@@ -130,7 +229,7 @@ def test_entire_algorithm_on_several_edge_weight_types(type_str, vertices, edge_
     if not error_raised:
         actual = fineman(graph, 0, weight_type = type_str)
         if globals.WEIGHT_TYPE is float:
-            _assert_distances_are_close(actual, expected)
+            assert_distances_are_close(actual, expected)
         else:
             assert(actual, expected)
 
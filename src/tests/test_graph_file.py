@@ -0,0 +1,75 @@
+from decimal import Decimal
+
+import numpy as np
+import pytest
+
+from src.fineman.csr_graph import CSRGraph
+from src.utils.graph_file import save_graph, load_graph, convert_json_graph, read_graph_header
+from src.utils.load_test_case import load_test_case
+import src.globals as globals
+
+TESTDATA_FILEPATH = "src/tests/test_data/graphs/"
+
+
+@pytest.mark.parametrize("weight_type", ["int", "float", "decimal"], indirect=True)
+@pytest.mark.parametrize("filename", [
+    "graph_with_neg_edges.json",
+    "tree_graph_single_root_with_100_children.json",
+    "disconnected_graph.json",
+    "graph_with_no_edges.json"
+])
+def test_converted_graph_loads_as_json_graph(tmp_path, weight_type, filename):
+    graph, neg_edges = load_test_case(TESTDATA_FILEPATH + filename)
+
+    path = convert_json_graph(TESTDATA_FILEPATH + filename, tmp_path / "graph.csr")
+
+    for mmap in [True, False]:
+        loaded = load_graph(path, mmap=mmap)
+        assert loaded.to_dict() == CSRGraph.from_dict(graph).to_dict()
+        assert loaded.edge_set() == neg_edges
+
+
+def test_loaded_arrays_are_read_only_memory_maps(tmp_path):
+    graph, _ = load_test_case(TESTDATA_FILEPATH + "graph_with_neg_edges.json")
+    save_graph(tmp_path / "graph.csr", graph)
+
+    loaded = load_graph(tmp_path / "graph.csr")
+
+    assert isinstance(loaded.targets, np.memmap)
+    assert not loaded.weights.flags.writeable
+    assert read_graph_header(tmp_path / "graph.csr")["m"] == loaded.m
+    assert all(spec["offset"] % 64 == 0 for spec in read_graph_header(tmp_path / "graph.csr")["arrays"].values())
+
+
+def test_decimal_weights_are_stored_exactly(tmp_path):
+    graph = {0: {1: Decimal("0.1"), 2: Decimal("-3.25")}, 1: {2: Decimal("1E-20")}, 2: {}}
+    with globals.using_weight_type(Decimal):
+        save_graph(tmp_path / "graph.csr", graph)
+
+        assert load_graph(tmp_path / "graph.csr").to_dict() == graph
+
+
+def test_decimal_weights_load_as_int_only_if_integral(tmp_path):
+    with globals.using_weight_type(Decimal):
+        save_graph(tmp_path / "integral.csr", {0: {1: Decimal("-3"), 2: Decimal("4.0")}, 1: {}, 2: {}})
+        save_graph(tmp_path / "fractional.csr", {0: {1: Decimal("-3"), 2: Decimal("4.5")}, 1: {}, 2: {}})
+
+    with globals.using_weight_type(int):
+        assert load_graph(tmp_path / "integral.csr").to_dict() == {0: {1: -3, 2: 4}, 1: {}, 2: {}}
+        with pytest.raises(ValueError):
+            load_graph(tmp_path / "fractional.csr")
+
+
+def test_float_weights_load_as_int_only_if_integral(tmp_path):
+    save_graph(tmp_path / "integral.csr", {0: {1: 2.0}, 1: {0: -1.0}})
+    save_graph(tmp_path / "fractional.csr", {0: {1: 2.5}, 1: {0: -1.25}})
+
+    with globals.using_weight_type(int):
+        assert load_graph(tmp_path / "integral.csr").to_dict() == {0: {1: 2}, 1: {0: -1}}
+        with pytest.raises(ValueError):
+            load_graph(tmp_path / "fractional.csr")
+
+
+def test_loading_other_files_fails():
+    with pytest.raises(ValueError):
+        load_graph(TESTDATA_FILEPATH + "graph_with_neg_edges.json")
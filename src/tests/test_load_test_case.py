@@ -0,0 +1,72 @@
+import json
+
+import pytest
+
+from src.fineman.csr_graph import CSRGraph
+from src.utils.load_test_case import iter_json_graph, load_test_case, load_csr_test_case
+import src.globals as globals
+
+TESTDATA_FILEPATH = "src/tests/test_data/graphs/"
+
+FILENAMES = [
+    "graph_with_neg_edges.json",
+    "disconnected_graph.json",
+    "disconnected_triangles.json",
+    "graph_with_no_edges.json",
+    "9_vertex_dag_sandwich.json",
+]
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 1 << 20])
+@pytest.mark.parametrize("filename", FILENAMES)
+def test_streamed_graph_equals_parsed_document(filename, chunk_size):
+    with open(TESTDATA_FILEPATH + filename) as file:
+        document = json.load(file)
+
+    streamed = list(iter_json_graph(TESTDATA_FILEPATH + filename, chunk_size=chunk_size))
+
+    assert streamed == [(int(vertex), edges) for vertex, edges in document.items()]
+
+
+@pytest.mark.parametrize("text", ['{"0": [[1, 2]]', '{"0" [[1, 2]]}', '[[0, 1, 2]]', '{"0": [[1, 2]],}'])
+def test_malformed_document_raises(tmp_path, text):
+    path = tmp_path / "graph.json"
+    path.write_text(text)
+
+    with pytest.raises(ValueError):
+        list(iter_json_graph(path, chunk_size=4))
+
+
+@pytest.mark.parametrize("weight_type", ["int", "float", "decimal"], indirect=True)
+@pytest.mark.parametrize("filename", FILENAMES)
+def test_loaded_graph_matches_document(weight_type, filename):
+    with open(TESTDATA_FILEPATH + filename) as file:
+        document = json.load(file)
+
+    graph, neg_edges = load_test_case(TESTDATA_FILEPATH + filename)
+
+    assert graph == {int(vertex): {neighbor: globals.WEIGHT_TYPE(weight) for neighbor, weight in edges}
+                     for vertex, edges in document.items()}
+    assert neg_edges == {(u, v) for u in graph for v, w in graph[u].items() if w < 0}
+
+
+@pytest.mark.parametrize("weight_type", ["int", "float", "decimal"], indirect=True)
+@pytest.mark.parametrize("only_cc", [False, True])
+@pytest.mark.parametrize("filename", FILENAMES)
+def test_csr_test_case_matches_dictionary(weight_type, only_cc, filename):
+    graph, neg_edges = load_test_case(TESTDATA_FILEPATH + filename, only_cc)
+
+    csr, neg_mask = load_csr_test_case(TESTDATA_FILEPATH + filename, only_cc)
+
+    assert csr.to_dict() == CSRGraph.from_dict(graph).to_dict()
+    assert csr.edge_set(neg_mask) == neg_edges
+
+
+def test_only_cc_renames_in_breadth_first_order(tmp_path):
+    path = tmp_path / "graph.json"
+    path.write_text('{"5": [[7, -1]], "0": [[9, 2], [3, 1]], "3": [[5, 4]], "9": [], "7": [[0, 1]], "8": [[0, 1]]}')
+
+    graph, neg_edges = load_test_case(path, only_cc=True)
+
+    assert graph == {0: {1: 2, 2: 1}, 1: {}, 2: {3: 4}, 3: {4: -1}, 4: {0: 1}}
+    assert neg_edges == {(3, 4)}
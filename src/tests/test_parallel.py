@@ -0,0 +1,165 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+
+import pytest
+
+import src.globals as globals
+from src.fineman.betweenness_reduction import betweenness_reduction
+from src.fineman.csr_graph import CSRGraph
+from src.fineman.finemans_algorithm import fineman, multi_source_fineman
+from src.fineman.heavy_light_partition import heavy_light_partition
+from src.fineman.independent_set_or_crust import find_is_or_crust
+from src.fineman.parallel import ParallelExecutor, SharedGraph
+from src.scripts.double_tree_graph_generator import generate_double_tree
+from src.utils import NegativeCycleError
+from src.utils.load_test_case import load_test_case
+
+TESTDATA_FILEPATH = "src/tests/test_data/graphs/"
+
+
+def _attached_arrays(shared):
+    graph = shared.attach()
+    return graph.offsets.tolist(), graph.targets.tolist(), graph.weights.tolist(), graph.neg_mask.tolist()
+
+
+def _raise_negative_cycle(cycle):
+    raise NegativeCycleError(cycle)
+
+
+@pytest.fixture(scope="module")
+def executors():
+    with ParallelExecutor(1) as one, ParallelExecutor(3) as three:
+        yield one, three
+
+
+def test_negative_cycle_error_keeps_cycle_across_workers(executors):
+    with pytest.raises(NegativeCycleError) as error:
+        executors[1].map(_raise_negative_cycle, [[0, 2, 1, 0]])
+
+    assert error.value.get_cycle() == [0, 2, 1, 0]
+    assert str(error.value) == "A negative cycle was found!"
+
+
+def test_shared_graph_is_attached_in_workers(executors):
+    graph, _ = load_test_case(TESTDATA_FILEPATH + "graph_with_neg_edges.json")
+    csr = CSRGraph.from_dict(graph)
+
+    with SharedGraph(csr) as shared:
+        (actual,) = executors[1].map(_attached_arrays, [shared])
+
+    assert actual == (csr.offsets.tolist(), csr.targets.tolist(), csr.weights.tolist(), csr.neg_mask.tolist())
+
+
+@pytest.mark.parametrize("filename,subset", [
+    ("small_grid_3_negative_vertices.json", {0, 5, 7}),
+    ("8_vertex_cycle_with_large_weights.json", {0, 4})
+])
+def test_heavy_light_partition_does_not_depend_on_worker_count(executors, filename, subset):
+    graph, neg_edges = load_test_case(TESTDATA_FILEPATH + filename)
+
+    one, three = [heavy_light_partition(graph, neg_edges, subset, len(subset), 3, seed=7, executor=executor)
+                  for executor in executors]
+
+    assert one == three
+
+
+def test_betweenness_reduction_matches_sequential(executors):
+    graph, neg_edges = load_test_case(TESTDATA_FILEPATH + "graph_with_neg_edges.json")
+
+    expected = betweenness_reduction(graph, neg_edges, tau=2, beta=3, seed=3)
+    actual = betweenness_reduction(graph, neg_edges, tau=2, beta=3, seed=3, executor=executors[1])
+
+    assert actual == expected
+
+
+def test_find_is_or_crust_does_not_depend_on_worker_count(executors):
+    graph, neg_edges = generate_double_tree(4, -8)
+    csr = CSRGraph.from_dict(graph)
+    t_csr = csr.transpose()
+    negative_subset = set(csr.sources[csr.neg_mask].tolist())
+
+    one, three = [find_is_or_crust(csr, csr.neg_mask, t_csr.neg_mask, negative_subset, seed=11, executor=executor)
+                  for executor in executors]
+
+    assert one == three
+
+
+@pytest.mark.parametrize("depth", [3, 5])
+def test_parallel_fineman_matches_sequential(depth):
+    graph, _ = generate_double_tree(depth, -(depth * 2))
+
+    assert fineman(graph, 0, seed=depth, workers=2) == fineman(graph, 0, seed=depth)
+
+
+def test_parallel_multi_source_fineman_matches_sequential():
+    graph, _ = generate_double_tree(4, -8)
+    sources = [0, 3, 7, 11, 20]
+
+    assert (multi_source_fineman(graph, sources, seed=4, workers=2) ==
+            multi_source_fineman(graph, sources, seed=4)).all()
+
+
+@pytest.mark.parametrize("as_csr", [False, True])
+def test_threads_share_one_graph(as_csr):
+    graph, _ = generate_double_tree(4, -8)
+    expected_graph = {u: dict(neighborhood) for u, neighborhood in graph.items()}
+    shared = CSRGraph.from_dict(graph) if as_csr else graph
+    sources = list(range(0, len(graph), 3))
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        actual = list(pool.map(lambda source: fineman(shared, source, seed=source), sources))
+
+    assert actual == [fineman(expected_graph, source, seed=source) for source in sources]
+    assert graph == expected_graph
+
+
+def _with_weight_type(graph, weight_type):
+    return {u: {v: weight_type(w) for v, w in neighborhood.items()} for u, neighborhood in graph.items()}
+
+
+def test_threads_solve_with_different_weight_types():
+    graph, _ = generate_double_tree(4, -8)
+    graphs = {int: _with_weight_type(graph, int), Decimal: _with_weight_type(graph, Decimal)}
+    weight_types = [int, Decimal] * 4
+
+    def solve(weight_type):
+        distances = fineman(graphs[weight_type], 0, seed=1, weight_type=weight_type)
+        return distances, globals.WEIGHT_TYPE
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        results = list(pool.map(solve, weight_types))
+
+    expected = fineman(graph, 0, seed=1, weight_type=int)
+    for weight_type, (distances, current) in zip(weight_types, results):
+        assert current is weight_type
+        assert distances == expected
+        assert all(isinstance(d, Decimal) for d in distances[1:]) == (weight_type is Decimal)
+
+
+def test_asyncio_tasks_keep_their_weight_type():
+    graph, _ = generate_double_tree(3, -6)
+
+    async def solve(weight_type):
+        distances = fineman(_with_weight_type(graph, weight_type), 0, seed=1, weight_type=weight_type)
+        await asyncio.sleep(0)
+        return distances, globals.WEIGHT_TYPE
+
+    async def solve_all():
+        return await asyncio.gather(solve(Decimal), solve(float), solve(int))
+
+    results = asyncio.run(solve_all())
+
+    assert [current for _, current in results] == [Decimal, float, int]
+    assert results[0][0] == results[1][0] == results[2][0]
+
+
+def test_using_weight_type_restores_the_previous_type():
+    globals.change_weight_type(int)
+    with globals.using_weight_type("decimal") as weight_type:
+        assert weight_type is Decimal and globals.WEIGHT_TYPE is Decimal
+        with globals.using_weight_type(float):
+            assert globals.WEIGHT_TYPE is float
+        assert globals.WEIGHT_TYPE is Decimal
+    assert globals.WEIGHT_TYPE is int
+    globals.change_weight_type(float)
@@ -0,0 +1,83 @@
+import pytest
+
+import src.fineman.finemans_algorithm as finemans_algorithm
+import src.globals as globals
+from src.fineman.csr_graph import CSRGraph
+from src.fineman.finemans_algorithm import fineman
+from src.fineman.potential_cache import PotentialCache, graph_fingerprint
+from src.scripts import standard_bellman_ford
+from src.scripts.double_tree_graph_generator import generate_double_tree
+from src.tests.helpers import assert_distances_are_close
+
+
+def test_fingerprint_depends_on_structure_weights_and_weight_type():
+    graph, _ = generate_double_tree(3, -6)
+    changed = {u: dict(edges) for u, edges in graph.items()}
+    u = next(u for u in changed if changed[u])
+    v = next(iter(changed[u]))
+    changed[u][v] += 1
+
+    fingerprint = graph_fingerprint(CSRGraph.from_dict(graph))
+
+    assert graph_fingerprint(CSRGraph.from_dict(dict(graph))) == fingerprint
+    assert graph_fingerprint(CSRGraph.from_dict(changed)) != fingerprint
+    globals.change_weight_type(int)
+    assert graph_fingerprint(CSRGraph.from_dict(graph)) != fingerprint
+
+
+def test_cached_elimination_serves_other_sources(monkeypatch):
+    graph, _ = generate_double_tree(4, -8)
+    cache = PotentialCache()
+
+    assert_distances_are_close(fineman(graph, 0, cache=cache), standard_bellman_ford(graph, 0))
+    assert len(cache) == 1
+
+    def fail(*args):
+        raise AssertionError("the elimination rounds ran again")
+    monkeypatch.setattr(finemans_algorithm, "_eliminate_negative_edges", fail)
+
+    for source in [1, 5, len(graph) - 1]:
+        assert_distances_are_close(fineman(graph, source, cache=cache), standard_bellman_ford(graph, source))
+
+
+def test_cached_graph_is_reweighting_of_preprocessed_graph():
+    graph, _ = generate_double_tree(4, -8)
+    cache = PotentialCache()
+    fineman(graph, 0, cache=cache)
+
+    org_graph, origin, reweighted = cache.get(graph_fingerprint(CSRGraph.from_dict(graph)))
+
+    assert reweighted.base_weights is org_graph.base_weights
+    assert reweighted.neg_count == 0
+    assert len(origin) == org_graph.n
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = PotentialCache(max_entries=2)
+    graphs = [generate_double_tree(depth, -2 * depth)[0] for depth in [2, 3, 4]]
+    keys = [graph_fingerprint(CSRGraph.from_dict(graph)) for graph in graphs]
+
+    fineman(graphs[0], 0, cache=cache)
+    fineman(graphs[1], 0, cache=cache)
+    fineman(graphs[0], 0, cache=cache)
+    fineman(graphs[2], 0, cache=cache)
+
+    assert len(cache) == 2
+    assert keys[0] in cache and keys[2] in cache
+    assert keys[1] not in cache
+
+
+@pytest.mark.parametrize("weight_type", ["int", "float", "decimal"])
+def test_disk_tier_survives_the_memory_tier(tmp_path, monkeypatch, weight_type):
+    graph, _ = generate_double_tree(4, -8)
+    fineman(graph, 0, weight_type=weight_type, cache=PotentialCache(directory=tmp_path))
+
+    def fail(*args):
+        raise AssertionError("the elimination rounds ran again")
+    monkeypatch.setattr(finemans_algorithm, "_eliminate_negative_edges", fail)
+
+    cache = PotentialCache(directory=tmp_path)
+    actual = fineman(graph, 3, weight_type=weight_type, cache=cache)
+
+    assert len(cache) == 1
+    assert_distances_are_close(actual, standard_bellman_ford(graph, 3))
@@ -1,5 +1,9 @@
+import numpy as np
 import pytest
+from src.fineman.core_functions import transpose_graph
+from src.fineman.csr_graph import CSRGraph
 from src.fineman.preprocessing import *
+from src.scripts import standard_bellman_ford
 from src.utils.load_test_case import load_test_case
 
 TESTDATA_FILEPATH = "src/tests/test_data/graphs/"
@@ -85,3 +89,45 @@ def test_on_graph(filename, n, m):
     transposed_graph, _ = transpose_graph(graph)
     assert all(len(neighbors) <= threshold for neighbors in transposed_graph.values())
 
+
+@pytest.mark.parametrize("filename,threshold", [
+    ("small_graph_with_neg_edges.json", 3),
+    ("high_in_degree_graph.json", 4),
+    ("tree_graph_single_root_with_100_children.json", 10)
+])
+def test_split_vertices_bounds_degrees_and_keeps_distances(filename, threshold):
+    graph, _ = load_test_case(TESTDATA_FILEPATH + filename)
+    csr = CSRGraph.from_dict(graph)
+
+    split_graph, origin = split_vertices(csr, threshold)
+
+    assert np.bincount(split_graph.sources).max() <= threshold
+    assert np.bincount(split_graph.targets).max() <= threshold
+    assert all(np.bincount(split_graph.sources)[v] == 1 for v in split_graph.neg_vertices())
+
+    assert len(origin) == split_graph.n
+    assert list(origin[:csr.n]) == list(range(csr.n))
+    assert all(origin[csr.n:] < csr.n)
+
+    expected = standard_bellman_ford(graph, 0)
+    actual = standard_bellman_ford(split_graph.to_dict(), 0)
+    assert [actual[v] for v in range(csr.n)] == [expected[v] for v in range(csr.n)]
+
+
+def test_split_vertices_records_origin_of_split_vertices():
+    graph, _ = load_test_case(TESTDATA_FILEPATH + "tree_graph_single_root_with_100_children.json")
+
+    split_graph, origin = split_vertices(CSRGraph.from_dict(graph), 10)
+
+    assert split_graph.n == 131
+    assert all(origin[101:] == 0)
+
+
+@pytest.mark.parametrize("transform", [ensure_simp1, lambda graph: ensure_simp2(graph, 2)])
+def test_transformations_leave_the_input_untouched(transform):
+    graph, _ = load_test_case(TESTDATA_FILEPATH + "tree_graph_two_layered_negative_root.json")
+    expected = {u: dict(neighborhood) for u, neighborhood in graph.items()}
+
+    transform(graph)
+
+    assert graph == expected
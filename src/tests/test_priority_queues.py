@@ -0,0 +1,67 @@
+import pytest
+from numpy import inf
+
+from src.fineman.csr_graph import CSRGraph
+from src.fineman.priority_queues import heap_search, tolerant_heap_search, bucket_search, search_strategy
+from src.utils.load_test_case import load_test_case
+import src.globals as globals
+
+TESTDATA_FILEPATH = "src/tests/test_data/graphs/"
+
+
+def _search(search, graph, entries):
+    offsets, targets, weights, neg = graph.lists()
+    dist = [inf] * graph.n
+    for d, v in entries:
+        dist[v] = min(dist[v], d)
+
+    relaxed = []
+    search(offsets, targets, weights, neg, dist, list(entries), lambda u, v, i: relaxed.append((u, v)))
+    return dist, relaxed
+
+
+@pytest.fixture
+def int_weights():
+    globals.change_weight_type(int)
+    yield
+    globals.change_weight_type(float)
+
+
+@pytest.mark.parametrize("filename", [
+    "complete_4_vertices_graph_with_no_neg_edges.json",
+    "small_graph_with_neg_edges.json",
+    "graph_with_neg_edges.json",
+    "path_tricky.json",
+    "disconnected_graph.json"
+])
+def test_bucket_search_matches_heap_search(int_weights, filename):
+    graph, _ = load_test_case(TESTDATA_FILEPATH + filename)
+    csr = CSRGraph.from_dict(graph)
+
+    for entries in ([(0, 0)], [(0, v) for v in range(csr.n)], [(-v, v) for v in range(0, csr.n, 2)]):
+        assert _search(bucket_search, csr, entries)[0] == _search(heap_search, csr, entries)[0]
+
+
+def test_bucket_search_follows_zero_weight_edges_within_a_bucket(int_weights):
+    csr = CSRGraph.from_dict({0: {1: 0, 2: 4}, 1: {2: 0}, 2: {3: 1}, 3: {}})
+
+    dist, relaxed = _search(bucket_search, csr, [(0, 0)])
+
+    assert dist == [0, 0, 0, 1]
+    assert relaxed == [(0, 1), (0, 2), (1, 2), (2, 3)]
+
+
+def test_search_strategy_depends_on_weight_type(int_weights):
+    assert search_strategy() is bucket_search
+    globals.change_weight_type(float)
+    assert search_strategy() is tolerant_heap_search
+    assert search_strategy(tolerant=False) is heap_search
+    globals.change_weight_type("decimal")
+    assert search_strategy() is heap_search
+
+
+def test_tolerant_heap_search_ignores_rounding_errors():
+    csr = CSRGraph.from_dict({0: {1: 0.1, 2: 0.3}, 1: {2: 0.2 - 1e-12}, 2: {}})
+
+    assert _search(tolerant_heap_search, csr, [(0.0, 0)])[1] == [(0, 1), (0, 2)]
+    assert _search(heap_search, csr, [(0.0, 0)])[1] == [(0, 1), (0, 2), (1, 2)]
@@ -1,5 +1,5 @@
 import pytest
-from src.scripts.bellman_ford import standard_bellman_ford
+from src.scripts.bellman_ford import standard_bellman_ford, BASELINES
 from src.utils.load_test_case import load_test_case
 from src.utils.cycle_error import NegativeCycleError
 from numpy import inf
@@ -27,3 +27,59 @@ def test_standard_bellman_ford_implementation_for_negative_cycles(source,filenam
     
     with pytest.raises(NegativeCycleError):
         standard_bellman_ford(graph, source)
+
+
+@pytest.mark.parametrize("baseline", BASELINES)
+@pytest.mark.parametrize("source,expected,filename", [
+    (0,[0,-1,-1,inf,inf,inf],"disconnected_triangles.json"),
+    (3,[inf,inf,inf,0,-1,-1],"disconnected_triangles.json"),
+    (0,[0,2,6,11,7,15,8,-4,10,8,5,-3,-2,4,-6,5,2,-7,-8,0,-4,0,-1],"small_tree.json")
+])
+def test_baselines_on_various_graphs(baseline, source, expected, filename):
+    graph,_ = load_test_case(TESTDATA_FILEPATH+filename)
+    actual = BASELINES[baseline](graph, source)
+    assert actual == expected
+
+
+@pytest.mark.parametrize("baseline", BASELINES)
+@pytest.mark.parametrize("weight_type", ["int", "float", "decimal"])
+@pytest.mark.parametrize("filename", [
+    "small_graph_with_neg_edges.json",
+    "9_vertex_dag_sandwich.json",
+    "path_tricky.json",
+    "graph_with_neg_edges.json",
+    "high_in_degree_graph.json"
+])
+def test_baselines_agree_with_standard_bellman_ford(baseline, weight_type, filename):
+    globals.change_weight_type(weight_type)
+    graph,_ = load_test_case(TESTDATA_FILEPATH+filename)
+
+    assert BASELINES[baseline](graph, 0) == standard_bellman_ford(graph, 0)
+    globals.change_weight_type("float")
+
+
+@pytest.mark.parametrize("baseline", BASELINES)
+@pytest.mark.parametrize("source,filename", [
+    (0,"negative_cycle_4.json"),
+    (0,"negative_cycle_6.json"),
+    (0,"graph_with_neg_cycle.json"),
+])
+def test_baselines_report_negative_cycles(baseline, source, filename):
+    graph,_ = load_test_case(TESTDATA_FILEPATH+filename)
+
+    with pytest.raises(NegativeCycleError) as error:
+        BASELINES[baseline](graph, source, with_parent=True)
+
+    cycle = error.value.get_cycle()
+    assert cycle[0] == cycle[-1]
+    assert sum(graph[u][v] for u, v in zip(cycle, cycle[1:])) < 0
+
+
+@pytest.mark.parametrize("baseline", BASELINES)
+def test_baselines_report_no_cycle_without_parents(baseline):
+    graph,_ = load_test_case(TESTDATA_FILEPATH+"negative_cycle_4.json")
+
+    with pytest.raises(NegativeCycleError) as error:
+        BASELINES[baseline](graph, 0)
+
+    assert error.value.get_cycle() is None
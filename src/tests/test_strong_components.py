@@ -0,0 +1,128 @@
+import networkx as nx
+import numpy as np
+import pytest
+
+import src.fineman.finemans_algorithm as finemans_algorithm
+import src.globals as globals
+from src.fineman.csr_graph import CSRGraph
+from src.fineman.engines import bellman_ford_dijkstra
+from src.fineman.finemans_algorithm import fineman
+from src.fineman.strong_components import reweight_by_components, strongly_connected_components
+from src.scripts import standard_bellman_ford
+from src.tests.helpers import assert_distances_are_close
+from src.utils import NegativeCycleError
+from src.utils.load_test_case import load_test_case
+
+TESTDATA_FILEPATH = "src/tests/test_data/graphs/"
+
+
+def _chain_of_cycles(cycles, length, negative_every = None):
+    """
+    Cycles with one negative edge each, or one every negative_every edges, joined in a chain by negative edges between
+    consecutive cycles.
+    """
+    graph = {}
+    for c in range(cycles):
+        vertices = range(c * length, (c + 1) * length)
+        for i, v in enumerate(vertices):
+            negative = i == 0 if negative_every is None else i % negative_every == 0
+            graph[v] = {vertices[(i + 1) % length]: -1 if negative else 2}
+        if c:
+            graph[c * length - 1][c * length] = -5
+    return graph
+
+
+@pytest.mark.parametrize("filename", [
+    "graph_with_neg_edges.json",
+    "graph_with_neg_cycle.json",
+    "disconnected_graph.json",
+    "9_vertex_dag_sandwich.json",
+    "small_grid_with_negative_edges.json",
+    "graph_with_no_edges.json"
+])
+def test_components_match_networkx(filename):
+    graph, _ = load_test_case(TESTDATA_FILEPATH + filename)
+    labels, count = strongly_connected_components(CSRGraph.from_dict(graph))
+
+    expected = list(nx.strongly_connected_components(nx.DiGraph([(u, v) for u in graph for v in graph[u]])))
+    expected += [{v} for v in graph if not any(v in component for component in expected)]
+
+    assert count == len(expected)
+    assert all(len({labels[v] for v in component}) == 1 for component in expected)
+    assert all(labels[u] <= labels[v] for u in graph for v in graph[u])
+
+
+def test_components_of_long_path_do_not_recurse():
+    n = 50_000
+    graph = CSRGraph.from_edges(n, np.arange(n - 1), np.arange(1, n), np.ones(n - 1, dtype=np.int64))
+
+    labels, count = strongly_connected_components(graph)
+
+    assert count == n
+    assert (labels == np.arange(n)).all()
+
+
+def test_only_components_with_negative_edges_are_reweighted():
+    globals.change_weight_type(int)
+    graph = CSRGraph.from_dict(_chain_of_cycles(4, 5))
+    sizes = []
+
+    def reweight(component):
+        sizes.append(component.n)
+        return bellman_ford_dijkstra(component)
+
+    reweighted = reweight_by_components(graph, reweight)
+
+    assert sizes == [5] * 4
+    assert reweighted.neg_count == 0
+    assert reweighted.base_weights is graph.base_weights
+
+
+@pytest.mark.parametrize("weight_type", ["int", "float", "decimal"])
+def test_fineman_on_chain_of_components(weight_type):
+    globals.change_weight_type(weight_type)
+    graph = _chain_of_cycles(6, 4)
+    graph = {u: {v: globals.WEIGHT_TYPE(w) for v, w in edges.items()} for u, edges in graph.items()}
+
+    assert_distances_are_close(fineman(graph, 0, weight_type=weight_type, components=True), standard_bellman_ford(graph, 0))
+
+
+def test_negative_cycle_inside_a_component_is_reported():
+    globals.change_weight_type(int)
+    graph = _chain_of_cycles(3, 4)
+    graph[6][7] = -10
+
+    with pytest.raises(NegativeCycleError) as error:
+        fineman(graph, 0, weight_type=int, components=True)
+
+    cycle = error.value.get_cycle()
+    assert cycle[0] == cycle[-1]
+    assert sum(graph[u][v] for u, v in zip(cycle, cycle[1:])) < 0
+
+
+@pytest.mark.parametrize("weight_type", ["int", "float"])
+def test_elimination_rounds_run_inside_components(monkeypatch, weight_type):
+    globals.change_weight_type(weight_type)
+    graph = _chain_of_cycles(3, 12, negative_every=3)
+    sizes = []
+    elimination = finemans_algorithm.elimination_algorithm
+    monkeypatch.setattr(finemans_algorithm, "elimination_algorithm",
+                        lambda graph, *args, **kwargs: sizes.append(graph.n) or elimination(graph, *args, **kwargs))
+
+    actual = fineman(graph, 0, seed=1, weight_type=weight_type, hop_bounded=False, components=True)
+
+    assert sizes
+    assert max(sizes) < len(graph)
+    assert_distances_are_close(actual, standard_bellman_ford(graph, 0))
+
+
+def test_decomposition_can_be_skipped(monkeypatch):
+    graph = _chain_of_cycles(3, 12, negative_every=3)
+
+    def fail(*args, **kwargs):
+        raise AssertionError("the graph was decomposed")
+    monkeypatch.setattr(finemans_algorithm, "reweight_by_components", fail)
+
+    actual = fineman(graph, 0, seed=1, weight_type=int, hop_bounded=False, components=False)
+
+    assert_distances_are_close(actual, standard_bellman_ford(graph, 0))
@@ -1,4 +1,5 @@
-from .load_test_case import *
 from .cycle_error import *
+from .load_test_case import *
+from .graph_file import *
 
 __all__ = [name for name in dir() if not name.startswith("_")]
\ No newline at end of file
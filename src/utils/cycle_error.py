@@ -6,5 +6,9 @@ class NegativeCycleError(Exception):
         self.cycle = cycle
         super().__init__(self.message)
 
+    def __reduce__(self):
+        # keep the cycle when the error is pickled, e.g. raised in a worker process
+        return self.__class__, (self.cycle, self.message)
+
     def get_cycle(self):
         return self.cycle if self.cycle is not None else None
\ No newline at end of file
@@ -0,0 +1,121 @@
+from decimal import Decimal
+import json
+from pathlib import Path
+
+import numpy as np
+
+from src.fineman.csr_graph import CSRGraph, to_csr, weight_dtype
+from src.utils.load_test_case import load_csr_test_case
+import src.globals as globals
+
+# Binary graph files hold a CSR graph as raw arrays, so they can be memory-mapped instead of parsed. The layout is
+#
+#   MAGIC | header length (8 bytes, little endian) | JSON header | padding | offsets | targets | weights
+#
+# where the header records n, m, the weight type and the dtype, shape and byte offset of every array relative to
+# the end of the padded header. Arrays start at multiples of ALIGNMENT bytes. Decimal weights are stored as
+# fixed-width strings.
+
+MAGIC = b"FINEMAN-CSR\x00\x00\x00\x00\x01"
+ALIGNMENT = 64
+GRAPH_FILE_SUFFIX = ".csr"
+
+_WEIGHT_TYPE_NAMES = {int: "int", float: "float", Decimal: "decimal"}
+
+
+def _aligned(offset: int) -> int:
+    return -(-offset // ALIGNMENT) * ALIGNMENT
+
+
+def save_graph(path, graph, neg_edges=None):
+    """
+    Writes graph (a CSRGraph or nested dictionary) to path in the binary graph format. Only the edges are stored,
+    as the negative edges are those of negative weight.
+    """
+    graph = to_csr(graph, neg_edges)
+    weights = graph.weights
+    if weights.dtype == object:
+        weights = weights.astype(str)
+
+    arrays = {"offsets": np.ascontiguousarray(graph.offsets, dtype="<i8"),
+              "targets": np.ascontiguousarray(graph.targets, dtype="<i8"),
+              "weights": np.ascontiguousarray(weights)}
+
+    header = {"n": graph.n, "m": graph.m, "weight_type": _WEIGHT_TYPE_NAMES[globals.WEIGHT_TYPE], "arrays": {}}
+    offset = 0
+    for name, array in arrays.items():
+        header["arrays"][name] = {"dtype": array.dtype.str, "shape": array.shape, "offset": offset}
+        offset = _aligned(offset + array.nbytes)
+
+    encoded = json.dumps(header).encode()
+    data_start = _aligned(len(MAGIC) + 8 + len(encoded))
+    with open(path, "wb") as file:
+        file.write(MAGIC)
+        file.write(len(encoded).to_bytes(8, "little"))
+        file.write(encoded)
+        for name, array in arrays.items():
+            file.seek(data_start + header["arrays"][name]["offset"])
+            file.write(array.tobytes())
+
+
+def read_graph_header(path) -> dict:
+    """
+    Returns the header of a binary graph file, where the array offsets are made absolute.
+    """
+    with open(path, "rb") as file:
+        if file.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} is not a binary graph file")
+        length = int.from_bytes(file.read(8), "little")
+        header = json.loads(file.read(length))
+
+    data_start = _aligned(len(MAGIC) + 8 + length)
+    for spec in header["arrays"].values():
+        spec["offset"] += data_start
+    return header
+
+
+def load_graph(path, mmap: bool = True) -> CSRGraph:
+    """
+    Opens a binary graph file as a CSRGraph.
+
+    :param path: the graph file
+    :param mmap: whether to memory-map the arrays read-only instead of reading them, which makes opening a graph
+    independent of its size and lets processes loading the same file share its pages
+
+    :return: the graph, with weights of the current weight type
+    """
+    header = read_graph_header(path)
+    arrays = {}
+    for name, spec in header["arrays"].items():
+        dtype, shape = np.dtype(spec["dtype"]), tuple(spec["shape"])
+        if mmap and np.prod(shape) > 0:
+            arrays[name] = np.memmap(path, dtype=dtype, mode="r", offset=spec["offset"], shape=shape)
+        else:
+            with open(path, "rb") as file:
+                file.seek(spec["offset"])
+                arrays[name] = np.fromfile(file, dtype=dtype, count=int(np.prod(shape))).reshape(shape)
+
+    weights = arrays["weights"]
+    if globals.WEIGHT_TYPE is Decimal:
+        weights = np.array([Decimal(str(w)) for w in weights.tolist()], dtype=object)
+    elif weights.dtype != weight_dtype():
+        if weights.dtype.kind == "U":
+            weights = weights.astype(np.float64)
+        if globals.WEIGHT_TYPE is int and weights.dtype.kind != "i" and (weights != np.trunc(weights)).any():
+            raise ValueError(f"{path} has non-integral weights, which cannot be loaded as int")
+        weights = weights.astype(weight_dtype())
+
+    return CSRGraph(arrays["offsets"], arrays["targets"], weights)
+
+
+def convert_json_graph(json_path, out_path=None, only_cc=False) -> Path:
+    """
+    Converts a JSON test case to the binary graph format, parsing the weights as the current weight type.
+
+    :return: the path of the binary graph, by default json_path with the suffix replaced
+    """
+    out_path = Path(json_path).with_suffix(GRAPH_FILE_SUFFIX) if out_path is None else Path(out_path)
+    graph, _ = load_csr_test_case(json_path, only_cc)
+    save_graph(out_path, graph)
+    return out_path
+
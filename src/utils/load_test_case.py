@@ -1,69 +1,202 @@
+from array import array
 from decimal import Decimal
 import json
 import os
 from collections import deque
+
+import numpy as np
+
+from src.fineman.csr_graph import CSRGraph, weight_dtype
 import src.globals as globals
 
-def _find_connected_component_to_source(graph, source: int):
+_CHUNK_SIZE = 1 << 20
+
+
+def _weight_parser():
+    weight_type = globals.WEIGHT_TYPE
+    if weight_type is Decimal:
+        return Decimal
+    if weight_type is float:
+        return float
+    return int
+
+
+def iter_json_graph(path: str, chunk_size: int = _CHUNK_SIZE):
+    """
+    Reads a graph in the JSON format {"u": [[v, w], ...], ...} incrementally, yielding each vertex with its list
+    of [neighbor, weight] pairs in file order. Only a chunk of the file and the current adjacency list are held in
+    memory at any time.
+    """
+    decoder = json.JSONDecoder()
+    with open(path, 'r') as file:
+        buffer, pos, eof = "", 0, False
+
+        def more(size):
+            nonlocal buffer, pos, eof
+            chunk = file.read(size)
+            eof = not chunk
+            buffer, pos = buffer[pos:] + chunk, 0
+
+        def next_char():
+            nonlocal pos
+            while True:
+                while pos < len(buffer) and buffer[pos].isspace():
+                    pos += 1
+                if pos < len(buffer) or eof:
+                    return buffer[pos] if pos < len(buffer) else ""
+                more(chunk_size)
+
+        def next_value():
+            nonlocal pos
+            next_char()
+            while True:
+                try:
+                    value, end = decoder.raw_decode(buffer, pos)
+                    pos = end
+                    return value
+                except json.JSONDecodeError:
+                    if eof:
+                        raise
+                    # grow geometrically, so a long adjacency list is not parsed over and over
+                    more(max(chunk_size, len(buffer)))
+
+        def expect(chars):
+            nonlocal pos
+            char = next_char()
+            if char not in chars:
+                raise ValueError(f"Expected one of {chars!r} in {path} but found {char!r}")
+            pos += 1
+            return char
+
+        expect("{")
+        if next_char() == "}":
+            return
+        while True:
+            vertex = int(next_value())
+            expect(":")
+            yield vertex, next_value()
+            if expect(",}") == "}":
+                return
+
+
+def _load_adjacency(path: str):
+    """
+    Reads a JSON graph into compact arrays of edges in file order, where rows maps each vertex to the range of its
+    edges.
+    """
+    parse = _weight_parser()
+    rows = {}
+    sources = array('q')
+    targets = array('q')
+    weights = [] if parse is Decimal else array('q' if parse is int else 'd')
+
+    for vertex, edges in iter_json_graph(path):
+        start = len(targets)
+        for neighbor, weight in edges:
+            sources.append(vertex)
+            targets.append(neighbor)
+            weights.append(parse(weight))
+        rows[vertex] = (start, len(targets))
+    return rows, sources, targets, weights
+
+
+def _find_connected_component_to_source(rows, targets, source: int):
+    """
+    Numbers the vertices reachable from source in breadth first order, starting with source as 0.
+    """
     mapping = {}
     mapping[source] = 0
 
     queue = deque()
     queue.append(source)
 
-    explored = [False] * len(graph)
-    explored[source] = True
-
-    new_graph = {0: {}}
-    neg_edges = set()
-
     while queue:
         vertex = queue.popleft()
-        if mapping[vertex] not in new_graph:
-            new_graph[mapping[vertex]] = {}
-
-        for n, w in graph[vertex].items():
-            if not explored[n]:
-                new_name = len(mapping)
-                mapping[n] = new_name
+        start, end = rows.get(vertex, (0, 0))
+        for n in targets[start:end]:
+            if n not in mapping:
+                mapping[n] = len(mapping)
                 queue.append(n)
-                explored[n] = True
-            new_graph[mapping[vertex]][mapping[n]] = w
-            if w < 0:
-                neg_edges.add((mapping[vertex], mapping[n]))
-                
-    return new_graph, neg_edges
 
+    return mapping
 
-def load_test_case(path: str, only_cc = False):
 
-    with open(path, 'r') as file:
-        data = json.load(file)
+def load_test_case(path: str, only_cc = False):
+    """
+    Loads a JSON graph as a nested dictionary along with its set of negative edges. The file is streamed, so the
+    parsed JSON document is never held in memory next to the graph.
 
+    :param only_cc: keep only the vertices reachable from vertex 0, renamed in breadth first order
+    """
+    if only_cc:
+        rows, _, targets, weights = _load_adjacency(path)
+        mapping = _find_connected_component_to_source(rows, targets, 0)
+
+        new_graph = {}
+        neg_edges = set()
+        for vertex, new_name in mapping.items():
+            new_graph[new_name] = {}
+            start, end = rows.get(vertex, (0, 0))
+            for i in range(start, end):
+                new_graph[new_name][mapping[targets[i]]] = weights[i]
+                if weights[i] < 0:
+                    neg_edges.add((new_name, mapping[targets[i]]))
+        return new_graph, neg_edges
+
+    parse = _weight_parser()
     graph = {}
     neg_set = set()
 
-    for k, v in data.items():
-        vertex = int(k)
+    for vertex, edges in iter_json_graph(path):
         if vertex not in graph:
             graph[vertex] = {}
 
-        for neighbor, weight in v:
-            if globals.WEIGHT_TYPE is Decimal:
-                weight = Decimal(weight)
-            elif globals.WEIGHT_TYPE is float:
-                weight = float(weight)
-            else:
-                weight = int(weight)
+        for neighbor, weight in edges:
+            weight = parse(weight)
             graph[vertex][neighbor] = weight
 
             if weight < 0.0:
                 neg_set.add((vertex, neighbor))
 
-    if only_cc:
-        return _find_connected_component_to_source(graph, 0)
     return graph, neg_set
 
+
+def _as_array(values, dtype) -> np.ndarray:
+    # typed arrays are wrapped without copying
+    if isinstance(values, array) and values:
+        return np.frombuffer(values, dtype=dtype)
+    return np.array(values, dtype=dtype)
+
+
+def load_csr_test_case(path: str, only_cc = False):
+    """
+    Loads a JSON graph directly into CSR form, without building a dictionary. The edges are collected in compact
+    arrays while the file is streamed.
+
+    :param only_cc: keep only the vertices reachable from vertex 0, renamed in breadth first order as load_test_case
+    does
+
+    :return: the CSRGraph and its negative edge mask
+    """
+    rows, sources, targets, weights = _load_adjacency(path)
+    mapping = _find_connected_component_to_source(rows, targets, 0) if only_cc else None
+
+    sources, targets = _as_array(sources, np.int64), _as_array(targets, np.int64)
+    weights = _as_array(weights, weight_dtype())
+    vertices = np.fromiter(rows.keys(), dtype=np.int64, count=len(rows))
+    n = int(max(vertices.max(initial=-1), targets.max(initial=-1))) + 1
+
+    if only_cc:
+        renamed = np.full(n, -1, dtype=np.int64)
+        renamed[list(mapping.keys())] = list(mapping.values())
+        keep = renamed[sources] >= 0
+        sources, targets, weights = renamed[sources[keep]], renamed[targets[keep]], weights[keep]
+        n = len(mapping)
+
+    graph = CSRGraph.from_edges(n, sources, targets, weights)
+    return graph, graph.neg_mask
+
+
 def main():
     print(os.getcwd())
 